@@ -0,0 +1,129 @@
+"""
+Throughput of AsyncPostgresClient vs the threaded PostgresClient pool.
+
+Each simulated user run issues the workflow's per-email DB pattern: user
+context load, duplicate check, one upsert. The sync client runs them on a
+thread pool, the async client as concurrent coroutines; both use the same
+pool size. Run against a local Postgres with the schema migrated.
+
+Usage:
+    python -m benchmarks.bench_async_vs_sync_pool --runs 100 1000 10000 --pool-size 20
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from workflow.client.async_postgres_client import AsyncPostgresClient
+from workflow.client.postgres_client import PostgresClient
+from workflow.user_context import USER_CONTEXT_QUERY
+
+load_dotenv()
+
+SCRATCH_TABLE = "bench_async_runs"
+DUPLICATE_CHECK_QUERY = """
+    SELECT 1 FROM workflow_run
+    WHERE user_id = %s AND email_message_id = %s AND run_status = 'success'
+    LIMIT 1;
+"""
+CREATE_SCRATCH_TABLE = f"""
+    CREATE TABLE IF NOT EXISTS {SCRATCH_TABLE} (
+        id INT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+        user_id INT NOT NULL,
+        run_number INT NOT NULL,
+        UNIQUE (user_id, run_number)
+    );
+"""
+
+
+def sync_user_run(pg_client, run_number):
+    user_id = run_number % 1000
+    pg_client.execute_query(USER_CONTEXT_QUERY, ([user_id],))
+    pg_client.execute_query(DUPLICATE_CHECK_QUERY, (user_id, f"msg-{run_number}"))
+    pg_client.insert_or_update(
+        SCRATCH_TABLE,
+        {"user_id": user_id, "run_number": run_number},
+        conflict_columns=["user_id", "run_number"],
+    )
+
+
+async def async_user_run(pg_client, run_number):
+    user_id = run_number % 1000
+    await pg_client.execute_query(USER_CONTEXT_QUERY, ([user_id],))
+    await pg_client.execute_query(DUPLICATE_CHECK_QUERY, (user_id, f"msg-{run_number}"))
+    await pg_client.insert_or_update(
+        SCRATCH_TABLE,
+        {"user_id": user_id, "run_number": run_number},
+        conflict_columns=["user_id", "run_number"],
+    )
+
+
+def bench_sync(runs, pool_size, threads):
+    PostgresClient.reset_instance()
+    pg_client = PostgresClient(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=os.getenv("DB_PORT", 5432),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        minconn=pool_size,
+        maxconn=pool_size,
+        pool_timeout=300,
+    )
+    pg_client.execute_query(f"TRUNCATE {SCRATCH_TABLE};")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=min(runs, threads)) as executor:
+        list(executor.map(lambda n: sync_user_run(pg_client, n), range(runs)))
+    elapsed = time.perf_counter() - started
+
+    stats = pg_client.get_pool_stats()
+    pg_client.close()
+    return elapsed, stats["wait_seconds_avg"] * 1000
+
+
+async def bench_async(runs, pool_size):
+    async with AsyncPostgresClient.from_env(
+        minconn=pool_size, maxconn=pool_size, pool_timeout=300
+    ) as pg_client:
+        await pg_client.execute_query(f"TRUNCATE {SCRATCH_TABLE};")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(async_user_run(pg_client, n) for n in range(runs)))
+        elapsed = time.perf_counter() - started
+
+        stats = pg_client.get_pool_stats()
+    requests = stats.get("requests_num", 0) or 1
+    return elapsed, stats.get("requests_wait_ms", 0) / requests
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--runs", type=int, nargs="+", default=[100, 1000, 10000])
+    arg_parser.add_argument("--pool-size", type=int, default=20)
+    arg_parser.add_argument(
+        "--threads", type=int, default=200, help="Max worker threads for the sync client"
+    )
+    args = arg_parser.parse_args()
+
+    PostgresClient.reset_instance()
+    setup_client = PostgresClient.from_env()
+    setup_client.execute_query(CREATE_SCRATCH_TABLE)
+
+    print(f"{'runs':>7} | {'client':<6} | {'runs/s':>9} | {'total s':>8} | {'avg pool wait ms':>16}")
+    for runs in args.runs:
+        elapsed, wait_ms = bench_sync(runs, args.pool_size, args.threads)
+        print(f"{runs:>7} | {'sync':<6} | {runs / elapsed:>9.1f} | {elapsed:>8.2f} | {wait_ms:>16.2f}")
+
+        elapsed, wait_ms = asyncio.run(bench_async(runs, args.pool_size))
+        print(f"{runs:>7} | {'async':<6} | {runs / elapsed:>9.1f} | {elapsed:>8.2f} | {wait_ms:>16.2f}")
+
+    PostgresClient.reset_instance()
+    PostgresClient.from_env().execute_query(f"DROP TABLE IF EXISTS {SCRATCH_TABLE};")
+    PostgresClient.reset_instance()
+
+
+if __name__ == "__main__":
+    main()
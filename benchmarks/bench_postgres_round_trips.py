@@ -0,0 +1,107 @@
+"""
+Round trips per workflow run: ping-before-every-statement vs idle-time liveness.
+
+Replays the statements one `run_user_workflow` issues for a finance email
+(Gmail tokens, last email epoch, duplicate check, categories, Telegram chat id,
+transaction upsert, workflow_run upsert) against a local Postgres and reports
+how many round trips PostgresClient made per run.
+
+Usage:
+    python -m benchmarks.bench_postgres_round_trips --runs 200
+"""
+
+import argparse
+import os
+import time
+from dotenv import load_dotenv
+from workflow.client.postgres_client import PostgresClient
+
+load_dotenv()
+
+SCRATCH_TABLE = "bench_round_trips"
+
+READ_QUERIES = [
+    ("SELECT access_token, refresh_token FROM gmail_credentials WHERE user_id = %s;", 1),
+    ("SELECT MAX(run_end_datetime) AS last_run FROM workflow_run WHERE user_id = %s;", 1),
+    (
+        "SELECT 1 FROM workflow_run WHERE user_id = %s AND email_message_id = 'x' "
+        "AND run_status = 'success' LIMIT 1;",
+        1,
+    ),
+    (
+        "SELECT DISTINCT category FROM transaction_category WHERE user_id = %s AND is_active = TRUE;",
+        1,
+    ),
+    ("SELECT telegram_chat_id FROM user_telegram WHERE user_id = %s;", 1),
+]
+
+
+def build_client(idle_ping_seconds):
+    PostgresClient.reset_instance()
+    return PostgresClient(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=os.getenv("DB_PORT", 5432),
+        database=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        idle_ping_seconds=idle_ping_seconds,
+    )
+
+
+def simulate_run(pg_client, run_number):
+    for query, user_id in READ_QUERIES:
+        pg_client.execute_query(query, (user_id,))
+
+    # Two upserts, like insert_user_transaction_to_db + log_user_workflow_run
+    for kind in ("transaction", "workflow_run"):
+        pg_client.insert_or_update(
+            table=SCRATCH_TABLE,
+            data={"kind": kind, "run_number": run_number, "updated_at": "now()"},
+            conflict_columns=["kind", "run_number"],
+        )
+
+
+def bench(label, idle_ping_seconds, runs):
+    pg_client = build_client(idle_ping_seconds)
+    pg_client.execute_query(
+        f"""
+        CREATE TABLE IF NOT EXISTS {SCRATCH_TABLE} (
+            id INT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+            kind TEXT NOT NULL,
+            run_number INT NOT NULL,
+            updated_at TEXT,
+            UNIQUE (kind, run_number)
+        );
+        """
+    )
+    baseline = pg_client.get_pool_stats()["round_trips"]
+
+    started = time.perf_counter()
+    for run_number in range(runs):
+        simulate_run(pg_client, run_number)
+    elapsed = time.perf_counter() - started
+
+    stats = pg_client.get_pool_stats()
+    round_trips = stats["round_trips"] - baseline
+    print(
+        f"{label:<28} round trips/run: {round_trips / runs:5.2f}  "
+        f"pings: {stats['pings']:>6}  total: {elapsed:6.2f}s  "
+        f"per run: {elapsed / runs * 1000:6.2f}ms"
+    )
+    return pg_client
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument("--runs", type=int, default=200)
+    args = arg_parser.parse_args()
+
+    bench("ping before every statement", 0, args.runs)
+    pg_client = bench("idle-time liveness (30s)", 30, args.runs)
+
+    pg_client.execute_query(f"DROP TABLE IF EXISTS {SCRATCH_TABLE};")
+    pg_client.close()
+
+
+if __name__ == "__main__":
+    main()
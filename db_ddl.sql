@@ -29,10 +29,11 @@ CREATE TABLE IF NOT EXISTS user_transactions (
     user_id INT NOT NULL,
     transaction_id TEXT NOT NULL,
     transaction_type TEXT NOT NULL,
-    amount float NOT NULL,
+    amount NUMERIC(14, 2) NOT NULL,
     counterparty TEXT NOT NULL,
     transaction_date TEXT NOT NULL,
     transaction_time TEXT NOT NULL,
+    transaction_at TIMESTAMPTZ NOT NULL,
     transaction_category TEXT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     UNIQUE (user_id, transaction_id),
@@ -69,6 +70,7 @@ CREATE TABLE IF NOT EXISTS workflow_run (
     run_end_datetime TIMESTAMP,
     email_message_id TEXT NOT NULL,
     email_subject TEXT,
+    email_datetime TIMESTAMPTZ,
     is_finance_email BOOLEAN NOT NULL DEFAULT FALSE,
     run_status TEXT NOT NULL CHECK (run_status IN ('success', 'failure')),
     error_message TEXT DEFAULT '',
@@ -0,0 +1,49 @@
+-- Per-user Gmail processing watermark.
+-- Replaces the MAX(email_datetime) scan over workflow_run on every poll with a
+-- primary-key lookup. Kept up to date by a trigger on workflow_run, so the
+-- watermark advances in the same transaction that logs the run.
+
+ALTER TABLE workflow_run ADD COLUMN IF NOT EXISTS email_datetime TIMESTAMPTZ;
+
+
+CREATE TABLE IF NOT EXISTS user_email_watermark (
+    user_id INT PRIMARY KEY,
+    last_email_datetime TIMESTAMPTZ NOT NULL,
+    last_email_message_id TEXT,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+
+CREATE OR REPLACE FUNCTION advance_user_email_watermark() RETURNS trigger AS $$
+BEGIN
+    IF NEW.email_datetime IS NULL THEN
+        RETURN NULL;
+    END IF;
+
+    INSERT INTO user_email_watermark (user_id, last_email_datetime, last_email_message_id, updated_at)
+    VALUES (NEW.user_id, NEW.email_datetime, NEW.email_message_id, now())
+    ON CONFLICT (user_id) DO UPDATE
+    SET last_email_datetime = EXCLUDED.last_email_datetime,
+        last_email_message_id = EXCLUDED.last_email_message_id,
+        updated_at = now()
+    WHERE user_email_watermark.last_email_datetime < EXCLUDED.last_email_datetime;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+DROP TRIGGER IF EXISTS workflow_run_advance_watermark ON workflow_run;
+CREATE TRIGGER workflow_run_advance_watermark
+    AFTER INSERT OR UPDATE OF email_datetime ON workflow_run
+    FOR EACH ROW EXECUTE FUNCTION advance_user_email_watermark();
+
+
+-- One-time backfill from existing run history (no-op when already populated)
+INSERT INTO user_email_watermark (user_id, last_email_datetime, last_email_message_id)
+SELECT DISTINCT ON (user_id) user_id, email_datetime, email_message_id
+FROM workflow_run
+WHERE email_datetime IS NOT NULL
+ORDER BY user_id, email_datetime DESC
+ON CONFLICT (user_id) DO NOTHING;
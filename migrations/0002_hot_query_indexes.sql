@@ -0,0 +1,23 @@
+-- migrate:no-transaction
+-- Covering / partial indexes for the hot lookups in workflow/expense_tracker.py,
+-- workflow/user_context.py and web_app/database_client.py.
+-- Built CONCURRENTLY so applying them does not block the workflow's writes.
+
+-- get_user_gmail, user context loader: WHERE user_id = ? AND is_active
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_gmail_credentials_user_active
+    ON gmail_credentials (user_id) INCLUDE (gmail_email)
+    WHERE is_active;
+
+-- get_transaction_categories, user context loader: WHERE user_id = ? AND is_active
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transaction_category_user_active
+    ON transaction_category (user_id, category) INCLUDE (id)
+    WHERE is_active;
+
+-- is_message_already_processed: WHERE user_id = ? AND email_message_id = ? AND run_status = 'success'
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_workflow_run_user_success
+    ON workflow_run (user_id, email_message_id)
+    WHERE run_status = 'success';
+
+-- get_user_transactions: WHERE user_id = ? ORDER BY transaction_date DESC, id DESC
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_transactions_user_date
+    ON user_transactions (user_id, transaction_date DESC, id DESC);
@@ -0,0 +1,42 @@
+-- Typed transaction timestamp and exact amounts on user_transactions.
+-- transaction_date / transaction_time (TEXT, IST wall-clock) are kept for
+-- display compatibility; transaction_at is the column to filter, sort and
+-- aggregate on. amount moves from float to NUMERIC so sums don't drift.
+
+ALTER TABLE user_transactions ADD COLUMN IF NOT EXISTS transaction_at TIMESTAMPTZ;
+
+ALTER TABLE user_transactions
+    ALTER COLUMN amount TYPE NUMERIC(14, 2) USING round(amount::NUMERIC, 2);
+
+
+-- Parse the IST text columns, NULL for anything malformed (e.g. 2025-02-30).
+-- OR REPLACE: a re-run in the same session must not fail on the temp function
+CREATE OR REPLACE FUNCTION pg_temp.parse_ist_timestamp(txn_date TEXT, txn_time TEXT)
+RETURNS TIMESTAMPTZ AS $$
+BEGIN
+    RETURN (
+        txn_date || ' ' || COALESCE(NULLIF(btrim(txn_time), ''), '00:00:00')
+    )::TIMESTAMP AT TIME ZONE 'Asia/Kolkata';
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+UPDATE user_transactions
+SET transaction_at = pg_temp.parse_ist_timestamp(transaction_date, transaction_time)
+WHERE transaction_at IS NULL;
+
+-- Unparseable rows fall back to when they were recorded
+UPDATE user_transactions
+SET transaction_at = COALESCE(created_at::TIMESTAMPTZ, now())
+WHERE transaction_at IS NULL;
+
+ALTER TABLE user_transactions ALTER COLUMN transaction_at SET NOT NULL;
+
+
+-- Per-user listing and date-range filters / monthly rollups
+CREATE INDEX IF NOT EXISTS idx_user_transactions_user_at
+    ON user_transactions (user_id, transaction_at DESC, id DESC);
+
+-- Superseded by idx_user_transactions_user_at
+DROP INDEX IF EXISTS idx_user_transactions_user_date;
@@ -0,0 +1,152 @@
+-- Monthly range partitioning of workflow_run on email_datetime.
+-- email_datetime (Gmail's receive time) is stable across retries of the same
+-- email, so the upsert key becomes (user_id, email_message_id, email_datetime)
+-- and every index, including the unique one, is bounded by its partition.
+-- Old months are dropped by drop_workflow_run_partitions_older_than() instead
+-- of DELETE + VACUUM. user_transactions is deliberately not partitioned: its
+-- (user_id, transaction_id) uniqueness and the workflow_run FK need a global key.
+
+
+CREATE OR REPLACE FUNCTION ensure_workflow_run_partitions(
+    from_month DATE DEFAULT CURRENT_DATE,
+    months_ahead INT DEFAULT 3
+) RETURNS INT AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_month)::DATE;
+    last_month DATE := (date_trunc('month', now()) + make_interval(months => months_ahead))::DATE;
+    partition_name TEXT;
+    created INT := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        partition_name := 'workflow_run_' || to_char(month_start, 'YYYY_MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF workflow_run FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                month_start::TIMESTAMP AT TIME ZONE 'UTC',
+                (month_start + INTERVAL '1 month')::TIMESTAMP AT TIME ZONE 'UTC'
+            );
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::DATE;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION drop_workflow_run_partitions_older_than(retention_months INT)
+RETURNS INT AS $$
+DECLARE
+    cutoff DATE := (date_trunc('month', now()) - make_interval(months => retention_months))::DATE;
+    partition_name TEXT;
+    dropped INT := 0;
+BEGIN
+    FOR partition_name IN
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'workflow_run'
+          AND child.relname ~ '^workflow_run_\d{4}_\d{2}$'
+    LOOP
+        IF to_date(substr(partition_name, 14), 'YYYY_MM') < cutoff THEN
+            EXECUTE format('DROP TABLE %I', partition_name);
+            dropped := dropped + 1;
+        END IF;
+    END LOOP;
+    RETURN dropped;
+END;
+$$ LANGUAGE plpgsql;
+
+
+DO $$
+DECLARE
+    first_month DATE;
+BEGIN
+    -- Already partitioned: nothing to do
+    IF EXISTS (
+        SELECT 1 FROM pg_partitioned_table
+        WHERE partrelid = to_regclass('workflow_run')
+    ) THEN
+        RETURN;
+    END IF;
+
+    ALTER TABLE workflow_run RENAME TO workflow_run_unpartitioned;
+    ALTER INDEX IF EXISTS workflow_run_pkey RENAME TO workflow_run_unpartitioned_pkey;
+    ALTER INDEX IF EXISTS workflow_run_user_id_email_message_id_key
+        RENAME TO workflow_run_unpartitioned_user_id_email_message_id_key;
+    ALTER INDEX IF EXISTS idx_workflow_run_user_success
+        RENAME TO idx_workflow_run_unpartitioned_user_success;
+
+    CREATE SEQUENCE IF NOT EXISTS workflow_run_run_id_part_seq AS INT;
+
+    CREATE TABLE workflow_run (
+        run_id INT NOT NULL DEFAULT nextval('workflow_run_run_id_part_seq'),
+        user_id INT NOT NULL,
+        user_transaction_id INT DEFAULT NULL,
+        run_start_datetime TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        run_end_datetime TIMESTAMP,
+        email_message_id TEXT NOT NULL,
+        email_subject TEXT,
+        email_datetime TIMESTAMPTZ NOT NULL,
+        is_finance_email BOOLEAN NOT NULL DEFAULT FALSE,
+        run_status TEXT NOT NULL CHECK (run_status IN ('success', 'failure')),
+        error_message TEXT DEFAULT '',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (run_id, email_datetime),
+        UNIQUE (user_id, email_message_id, email_datetime),
+        FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE,
+        FOREIGN KEY (user_transaction_id) REFERENCES user_transactions (id) ON DELETE CASCADE
+    ) PARTITION BY RANGE (email_datetime);
+
+    ALTER SEQUENCE workflow_run_run_id_part_seq OWNED BY workflow_run.run_id;
+
+    -- Catches anything outside the pre-created months; kept empty in practice
+    CREATE TABLE workflow_run_default PARTITION OF workflow_run DEFAULT;
+
+    SELECT COALESCE(
+        min(COALESCE(email_datetime, run_start_datetime::TIMESTAMPTZ)),
+        now()
+    )::DATE
+    INTO first_month
+    FROM workflow_run_unpartitioned;
+
+    PERFORM ensure_workflow_run_partitions(first_month, 3);
+
+    INSERT INTO workflow_run (
+        run_id, user_id, user_transaction_id, run_start_datetime, run_end_datetime,
+        email_message_id, email_subject, email_datetime, is_finance_email,
+        run_status, error_message, created_at, updated_at
+    )
+    SELECT
+        run_id, user_id, user_transaction_id, run_start_datetime, run_end_datetime,
+        email_message_id, email_subject,
+        COALESCE(email_datetime, run_start_datetime::TIMESTAMPTZ),
+        is_finance_email, run_status, error_message, created_at, updated_at
+    FROM workflow_run_unpartitioned;
+
+    PERFORM setval(
+        'workflow_run_run_id_part_seq',
+        COALESCE((SELECT max(run_id) FROM workflow_run_unpartitioned), 0) + 1,
+        false
+    );
+
+    -- Also drops the old watermark trigger
+    DROP TABLE workflow_run_unpartitioned;
+END;
+$$;
+
+
+-- Partitioned equivalents of the per-table indexes and triggers
+CREATE INDEX IF NOT EXISTS idx_workflow_run_user_success
+    ON workflow_run (user_id, email_message_id)
+    WHERE run_status = 'success';
+
+DROP TRIGGER IF EXISTS workflow_run_advance_watermark ON workflow_run;
+CREATE TRIGGER workflow_run_advance_watermark
+    AFTER INSERT OR UPDATE OF email_datetime ON workflow_run
+    FOR EACH ROW EXECUTE FUNCTION advance_user_email_watermark();
+
+SELECT ensure_workflow_run_partitions(CURRENT_DATE, 3);
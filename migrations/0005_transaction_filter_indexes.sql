@@ -0,0 +1,9 @@
+-- migrate:no-transaction
+-- Keyset pagination of the dashboard / /api/transactions list filtered by category.
+-- Unfiltered and date-range pages use idx_user_transactions_user_at from 0003. The
+-- debit/credit filter is too unselective for its own index and is applied to either scan.
+
+-- get_user_transactions(category=?): WHERE user_id = ? AND transaction_category = ?
+--   AND (transaction_at, id) < (?, ?) ORDER BY transaction_at DESC, id DESC
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_transactions_user_category_at
+    ON user_transactions (user_id, transaction_category, transaction_at DESC, id DESC);
@@ -0,0 +1,110 @@
+-- Per-user spending totals by month (IST), category and type.
+-- Kept current by statement-level triggers on user_transactions, so single upserts,
+-- execute_values batches and COPY merges all apply one grouped delta per statement.
+-- Summaries read O(months x categories) rows instead of aggregating every transaction.
+
+CREATE TABLE IF NOT EXISTS user_spending_rollup (
+    user_id INT NOT NULL,
+    month DATE NOT NULL,
+    transaction_category TEXT NOT NULL,
+    transaction_type TEXT NOT NULL,
+    total NUMERIC(16, 2) NOT NULL DEFAULT 0,
+    transaction_count INT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (user_id, month, transaction_category, transaction_type),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+
+-- Calendar month a transaction belongs to, in the users' timezone
+CREATE OR REPLACE FUNCTION spending_month(transaction_at TIMESTAMPTZ) RETURNS DATE AS $$
+    SELECT date_trunc('month', transaction_at AT TIME ZONE 'Asia/Kolkata')::DATE;
+$$ LANGUAGE sql IMMUTABLE;
+
+
+CREATE OR REPLACE FUNCTION apply_user_spending_rollup() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO user_spending_rollup AS r
+            (user_id, month, transaction_category, transaction_type, total, transaction_count)
+        SELECT user_id, spending_month(transaction_at), transaction_category, transaction_type,
+               SUM(amount), COUNT(*)
+        FROM new_rows
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (user_id, month, transaction_category, transaction_type) DO UPDATE
+        SET total = r.total + EXCLUDED.total,
+            transaction_count = r.transaction_count + EXCLUDED.transaction_count,
+            updated_at = now();
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO user_spending_rollup AS r
+            (user_id, month, transaction_category, transaction_type, total, transaction_count)
+        SELECT user_id, spending_month(transaction_at), transaction_category, transaction_type,
+               -SUM(amount), -COUNT(*)
+        FROM old_rows
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (user_id, month, transaction_category, transaction_type) DO UPDATE
+        SET total = r.total + EXCLUDED.total,
+            transaction_count = r.transaction_count + EXCLUDED.transaction_count,
+            updated_at = now();
+
+        -- Recategorized / deleted transactions can empty a bucket
+        DELETE FROM user_spending_rollup
+        WHERE transaction_count = 0
+          AND user_id IN (SELECT DISTINCT user_id FROM old_rows);
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Transition tables rule out UPDATE OF <columns> and multi-event triggers, hence three
+DROP TRIGGER IF EXISTS user_transactions_rollup_insert ON user_transactions;
+CREATE TRIGGER user_transactions_rollup_insert
+    AFTER INSERT ON user_transactions
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_user_spending_rollup();
+
+DROP TRIGGER IF EXISTS user_transactions_rollup_update ON user_transactions;
+CREATE TRIGGER user_transactions_rollup_update
+    AFTER UPDATE ON user_transactions
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_user_spending_rollup();
+
+DROP TRIGGER IF EXISTS user_transactions_rollup_delete ON user_transactions;
+CREATE TRIGGER user_transactions_rollup_delete
+    AFTER DELETE ON user_transactions
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION apply_user_spending_rollup();
+
+
+-- Recompute the rollup from user_transactions for one user (or everyone when NULL).
+-- Blocks transaction writes, not reads, while it runs so no delta is lost.
+CREATE OR REPLACE FUNCTION rebuild_user_spending_rollup(p_user_id INT DEFAULT NULL)
+RETURNS INT AS $$
+DECLARE
+    rebuilt INT;
+BEGIN
+    LOCK TABLE user_transactions IN SHARE MODE;
+
+    DELETE FROM user_spending_rollup
+    WHERE p_user_id IS NULL OR user_id = p_user_id;
+
+    INSERT INTO user_spending_rollup
+        (user_id, month, transaction_category, transaction_type, total, transaction_count)
+    SELECT user_id, spending_month(transaction_at), transaction_category, transaction_type,
+           SUM(amount), COUNT(*)
+    FROM user_transactions
+    WHERE p_user_id IS NULL OR user_id = p_user_id
+    GROUP BY 1, 2, 3, 4;
+
+    GET DIAGNOSTICS rebuilt = ROW_COUNT;
+    RETURN rebuilt;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Initial build from existing transactions
+SELECT rebuild_user_spending_rollup();
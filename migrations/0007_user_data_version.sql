@@ -0,0 +1,70 @@
+-- Per-user change counter behind the JSON API's ETag / Last-Modified headers.
+-- Any write to a table the dashboard API serves bumps the owner's version once per
+-- statement, so a conditional GET is answered from this primary-key lookup alone.
+-- No foreign key to users: deleting a user cascades into the watched tables, and the
+-- triggers would then try to write a version for a row that is already gone.
+
+CREATE TABLE IF NOT EXISTS user_data_version (
+    user_id INT PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 1,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+
+CREATE OR REPLACE FUNCTION bump_user_data_version() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO user_data_version AS v (user_id)
+        SELECT DISTINCT user_id FROM new_rows
+        ON CONFLICT (user_id) DO UPDATE SET version = v.version + 1, updated_at = now();
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO user_data_version AS v (user_id)
+        SELECT user_id FROM new_rows UNION SELECT user_id FROM old_rows
+        ON CONFLICT (user_id) DO UPDATE SET version = v.version + 1, updated_at = now();
+    ELSE
+        INSERT INTO user_data_version AS v (user_id)
+        SELECT DISTINCT user_id FROM old_rows
+        ON CONFLICT (user_id) DO UPDATE SET version = v.version + 1, updated_at = now();
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Statement-level triggers (one bump per statement, not per row) on every served table
+DO $$
+DECLARE
+    watched_table TEXT;
+BEGIN
+    FOREACH watched_table IN ARRAY ARRAY[
+        'user_transactions', 'transaction_category', 'workflow',
+        'gmail_credentials', 'user_telegram', 'user_email_watermark'
+    ] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', watched_table || '_version_insert', watched_table);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT ON %I REFERENCING NEW TABLE AS new_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version()',
+            watched_table || '_version_insert', watched_table
+        );
+
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', watched_table || '_version_update', watched_table);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER UPDATE ON %I REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version()',
+            watched_table || '_version_update', watched_table
+        );
+
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', watched_table || '_version_delete', watched_table);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER DELETE ON %I REFERENCING OLD TABLE AS old_rows '
+            'FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version()',
+            watched_table || '_version_delete', watched_table
+        );
+    END LOOP;
+END $$;
+
+
+INSERT INTO user_data_version (user_id)
+SELECT id FROM users
+ON CONFLICT (user_id) DO NOTHING;
@@ -0,0 +1,11 @@
+-- migrate:no-transaction
+-- Fuzzy counterparty search ("all payments to X") for /api/transactions/search.
+-- pg_trgm indexes substring (ILIKE) and word-similarity (<%) matches, and btree_gin lets
+-- the same GIN index also narrow by user_id, so a search only touches that user's entries.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS btree_gin;
+
+-- search_transactions: WHERE user_id = ? AND (counterparty ILIKE ? OR ? <% counterparty)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_transactions_counterparty_trgm
+    ON user_transactions USING gin (user_id, counterparty gin_trgm_ops);
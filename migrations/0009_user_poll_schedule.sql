@@ -0,0 +1,17 @@
+-- Adaptive per-user Gmail polling (workflow/poll_schedule.py).
+-- The beat tick only starts runs for users whose next_poll_at has passed; each poll
+-- reschedules the user from their recent email arrival rate in workflow_run. Users
+-- without a row are due at once.
+
+CREATE TABLE IF NOT EXISTS user_poll_schedule (
+    user_id INT PRIMARY KEY,
+    interval_seconds INT NOT NULL,
+    emails_per_day NUMERIC(10, 2) NOT NULL DEFAULT 0,
+    next_poll_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    FOREIGN KEY (user_id) REFERENCES users (id) ON DELETE CASCADE
+);
+
+-- schedule_due_polls: WHERE next_poll_at <= now()
+CREATE INDEX IF NOT EXISTS idx_user_poll_schedule_next_poll
+    ON user_poll_schedule (next_poll_at);
@@ -0,0 +1,20 @@
+-- user_spending_rollup must not reference users (see 0007 for the same reasoning).
+-- Deleting a user cascades into user_transactions, and the statement-level delete
+-- trigger then writes negative deltas for a user the cascade already removed, so the
+-- foreign key made every user delete fail. The deltas zero the user's buckets, and
+-- the trigger deletes empty buckets, so no rows are left behind without it.
+
+DO $$
+DECLARE
+    fk_name TEXT;
+BEGIN
+    FOR fk_name IN
+        SELECT conname
+        FROM pg_constraint
+        WHERE conrelid = 'user_spending_rollup'::regclass
+          AND contype = 'f'
+    LOOP
+        EXECUTE format('ALTER TABLE user_spending_rollup DROP CONSTRAINT %I', fk_name);
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,89 @@
+-- Keep workflow_run_default from blocking new monthly partitions.
+-- Rows outside the pre-created months (e.g. a backfill of mail older than the first
+-- partition) land in the default partition, and Postgres then refuses to create a
+-- partition whose range holds any of them. Partitions are now created through
+-- create_workflow_run_partition(), which first moves the month's rows out of the
+-- default partition, and drain_workflow_run_default() gives every month found there
+-- its own partition. partition_maintenance runs the drain before creating months ahead.
+
+
+CREATE OR REPLACE FUNCTION create_workflow_run_partition(month_start DATE)
+RETURNS BOOLEAN AS $$
+DECLARE
+    partition_name TEXT := 'workflow_run_' || to_char(month_start, 'YYYY_MM');
+    range_start TIMESTAMPTZ := date_trunc('month', month_start)::TIMESTAMP AT TIME ZONE 'UTC';
+    range_end TIMESTAMPTZ := (date_trunc('month', month_start) + INTERVAL '1 month')::TIMESTAMP AT TIME ZONE 'UTC';
+BEGIN
+    IF to_regclass(partition_name) IS NOT NULL THEN
+        RETURN FALSE;
+    END IF;
+
+    -- No new rows for this month may reach the default partition until it exists
+    LOCK TABLE workflow_run_default IN ACCESS EXCLUSIVE MODE;
+
+    CREATE TEMP TABLE workflow_run_default_moved (LIKE workflow_run_default);
+    WITH moved AS (
+        DELETE FROM workflow_run_default
+        WHERE email_datetime >= range_start
+          AND email_datetime < range_end
+        RETURNING *
+    )
+    INSERT INTO workflow_run_default_moved SELECT * FROM moved;
+
+    EXECUTE format(
+        'CREATE TABLE %I PARTITION OF workflow_run FOR VALUES FROM (%L) TO (%L)',
+        partition_name,
+        range_start,
+        range_end
+    );
+
+    INSERT INTO workflow_run SELECT * FROM workflow_run_default_moved;
+    DROP TABLE workflow_run_default_moved;
+    RETURN TRUE;
+END;
+$$ LANGUAGE plpgsql;
+
+
+CREATE OR REPLACE FUNCTION ensure_workflow_run_partitions(
+    from_month DATE DEFAULT CURRENT_DATE,
+    months_ahead INT DEFAULT 3
+) RETURNS INT AS $$
+DECLARE
+    month_start DATE := date_trunc('month', from_month)::DATE;
+    last_month DATE := (date_trunc('month', now()) + make_interval(months => months_ahead))::DATE;
+    created INT := 0;
+BEGIN
+    WHILE month_start <= last_month LOOP
+        IF create_workflow_run_partition(month_start) THEN
+            created := created + 1;
+        END IF;
+        month_start := (month_start + INTERVAL '1 month')::DATE;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Give every month found in the default partition its own partition; returns rows moved
+CREATE OR REPLACE FUNCTION drain_workflow_run_default() RETURNS INT AS $$
+DECLARE
+    month_start DATE;
+    moved INT;
+BEGIN
+    SELECT count(*) INTO moved FROM workflow_run_default;
+    IF moved = 0 THEN
+        RETURN 0;
+    END IF;
+
+    FOR month_start IN
+        SELECT DISTINCT date_trunc('month', email_datetime AT TIME ZONE 'UTC')::DATE
+        FROM workflow_run_default
+    LOOP
+        PERFORM create_workflow_run_partition(month_start);
+    END LOOP;
+    RETURN moved;
+END;
+$$ LANGUAGE plpgsql;
+
+
+SELECT drain_workflow_run_default();
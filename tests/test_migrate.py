@@ -0,0 +1,56 @@
+from pathlib import Path
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("dotenv")
+
+from workflow.migrate import MIGRATIONS_DIR, NO_TRANSACTION_MARKER, _split_statements
+
+
+def _statements(file_name):
+    sql = (MIGRATIONS_DIR / file_name).read_text()
+    assert sql.startswith(NO_TRANSACTION_MARKER)
+    return _split_statements(sql)
+
+
+def test_split_transaction_filter_indexes():
+    statements = _statements("0005_transaction_filter_indexes.sql")
+
+    assert len(statements) == 1
+    assert statements[0].startswith(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_transactions_user_category_at"
+    )
+
+
+def test_split_counterparty_trigram_search():
+    statements = _statements("0008_counterparty_trigram_search.sql")
+
+    assert [statement.splitlines()[0] for statement in statements] == [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE EXTENSION IF NOT EXISTS btree_gin",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_transactions_counterparty_trgm",
+    ]
+
+
+def test_split_ignores_semicolons_in_comments():
+    sql = (
+        f"{NO_TRANSACTION_MARKER}\n"
+        "-- first; second\n"
+        "CREATE INDEX CONCURRENTLY a ON t (x); -- trailing; comment\n"
+        "  -- indented; comment\n"
+        "CREATE INDEX CONCURRENTLY b ON t (y);\n"
+    )
+
+    assert _split_statements(sql) == [
+        "CREATE INDEX CONCURRENTLY a ON t (x)",
+        "CREATE INDEX CONCURRENTLY b ON t (y)",
+    ]
+
+
+def test_every_no_transaction_migration_splits_into_sql():
+    for path in sorted(Path(MIGRATIONS_DIR).glob("*.sql")):
+        sql = path.read_text()
+        if not sql.startswith(NO_TRANSACTION_MARKER):
+            continue
+        for statement in _split_statements(sql):
+            assert statement.split()[0].upper() in ("CREATE", "DROP", "ALTER"), path.name
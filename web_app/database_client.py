@@ -1,12 +1,135 @@
+import base64
 import os
+import re
+import time
+from datetime import datetime
+from decimal import Decimal
 import psycopg2
 import psycopg2.extras
+import psycopg2.pool
+from contextlib import contextmanager
 from dotenv import load_dotenv
 from typing import Optional, Dict
-from threading import Lock
+from threading import BoundedSemaphore, Lock
+from workflow.client.cache_client import CacheClient, reference_key
 
 load_dotenv()
 
+TRANSACTION_PAGE_SIZE = int(os.getenv("TRANSACTION_PAGE_SIZE", 50))
+TRANSACTION_PAGE_MAX = 200
+TRANSACTION_COLUMNS = (
+    "id, transaction_id, transaction_type, amount, counterparty, "
+    "transaction_category, transaction_at"
+)
+
+
+def encode_transaction_cursor(transaction: Dict) -> str:
+    """Opaque keyset cursor pointing just past `transaction` (newest first)"""
+    raw = f"{transaction['transaction_at'].isoformat()}|{transaction['id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_transaction_cursor(cursor: str):
+    """Return (transaction_at, id) from a cursor, ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        transaction_at, transaction_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(transaction_at), int(transaction_id)
+    except Exception as e:
+        raise ValueError(f"Invalid transactions cursor: {cursor}") from e
+
+
+def _transaction_page_query(
+    user_id,
+    limit,
+    cursor=None,
+    start=None,
+    end=None,
+    category=None,
+    transaction_type=None,
+):
+    """
+    SELECT for one keyset page of a user's transactions, newest first.
+
+    Fetches limit + 1 rows so the caller can tell whether another page exists.
+    Served by idx_user_transactions_user_at, or idx_user_transactions_user_category_at
+    when filtering by category; the type filter is applied to those index scans.
+
+    Returns:
+        tuple: (sql, params)
+    """
+    conditions, params = _transaction_conditions(
+        user_id, start, end, category, transaction_type
+    )
+    if cursor:
+        cursor_at, cursor_id = decode_transaction_cursor(cursor)
+        conditions.append("(transaction_at, id) < (%s, %s)")
+        params += [cursor_at, cursor_id]
+
+    sql = f"""
+        SELECT {TRANSACTION_COLUMNS} FROM user_transactions
+        WHERE {" AND ".join(conditions)}
+        ORDER BY transaction_at DESC, id DESC
+        LIMIT %s
+    """
+    params.append(min(int(limit), TRANSACTION_PAGE_MAX) + 1)
+    return sql, params
+
+
+def encode_search_cursor(transaction: Dict) -> str:
+    """Opaque keyset cursor pointing just past `transaction` in search results"""
+    raw = (
+        f"{transaction['score']!r}|{transaction['transaction_at'].isoformat()}"
+        f"|{transaction['id']}"
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_search_cursor(cursor: str):
+    """Return (score, transaction_at, id) from a cursor, ValueError if it is malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        score, transaction_at, transaction_id = raw.split("|")
+        return float(score), datetime.fromisoformat(transaction_at), int(transaction_id)
+    except Exception as e:
+        raise ValueError(f"Invalid search cursor: {cursor}") from e
+
+
+def _transaction_conditions(
+    user_id, start=None, end=None, category=None, transaction_type=None
+):
+    """WHERE conditions (ANDed) and params for the transaction list filters"""
+    conditions = ["user_id = %s"]
+    params = [user_id]
+
+    if start:
+        conditions.append("transaction_at >= %s")
+        params.append(start)
+    if end:
+        conditions.append("transaction_at < %s")
+        params.append(end)
+    if category:
+        conditions.append("transaction_category = %s")
+        params.append(category)
+    if transaction_type:
+        conditions.append("transaction_type = %s")
+        params.append(transaction_type)
+    return conditions, params
+
+
+def _split_transaction_page(rows, limit):
+    """Trim the look-ahead row and build the next cursor from the last row kept"""
+    limit = min(int(limit), TRANSACTION_PAGE_MAX)
+    transactions = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit and transactions:
+        next_cursor = encode_transaction_cursor(transactions[-1])
+    return {"transactions": transactions, "next_cursor": next_cursor}
+
+
+# Redis key prefix of the shared read-your-writes window, one key per user
+READ_YOUR_WRITES_NAMESPACE = "mony:rw"
+
 
 class UserDB:
     _instance = None
@@ -19,7 +142,15 @@ class UserDB:
                     cls._instance = super(UserDB, cls).__new__(cls)
         return cls._instance
 
-    def __init__(self):
+    def __init__(self, dsn: Optional[str] = None, read_dsn: Optional[str] = None):
+        """
+        Configure the primary and (optional) read-replica connection pools
+
+        Args:
+            dsn (str, optional): Primary (write) DSN, defaults to the DB_* variables
+            read_dsn (str, optional): Replica DSN for dashboard reads, defaults to
+                the DB_READ_* variables; reads use the primary when neither is set
+        """
         # Prevent reinitialization on subsequent calls
         if not hasattr(self, "_initialized"):
             self.DB_HOST = os.getenv("DB_HOST")
@@ -27,14 +158,210 @@ class UserDB:
             self.DB_NAME = os.getenv("DB_NAME")
             self.DB_USER = os.getenv("DB_USER")
             self.DB_PASSWORD = os.getenv("DB_PASSWORD")
-            self.conn_string = (
+            self.conn_string = dsn or (
                 f"host={self.DB_HOST} port={self.DB_PORT} dbname={self.DB_NAME} "
                 f"user={self.DB_USER} password={self.DB_PASSWORD}"
             )
+
+            # Read replica (streaming standby of the primary)
+            self.read_conn_string = read_dsn
+            if not self.read_conn_string and os.getenv("DB_READ_HOST"):
+                self.read_conn_string = (
+                    f"host={os.getenv('DB_READ_HOST')} "
+                    f"port={os.getenv('DB_READ_PORT', self.DB_PORT)} "
+                    f"dbname={os.getenv('DB_READ_NAME', self.DB_NAME)} "
+                    f"user={os.getenv('DB_READ_USER', self.DB_USER)} "
+                    f"password={os.getenv('DB_READ_PASSWORD', self.DB_PASSWORD)}"
+                )
+            # After a user's own write, their reads stay on the primary this long
+            # so they never see replica lag. Kept in Redis (REDIS_URL) so every
+            # web worker sees it: the POST -> redirect -> GET usually lands on
+            # another worker. Without Redis it is only tracked per process.
+            self.READ_YOUR_WRITES_SECONDS = float(
+                os.getenv("WEB_DB_READ_YOUR_WRITES_SECONDS", 5)
+            )
+            self._last_writes = {}  # user_id -> monotonic time of last commit
+            self._redis = None
+            if os.getenv("REDIS_URL"):
+                import redis
+
+                self._redis = redis.Redis.from_url(
+                    os.getenv("REDIS_URL"),
+                    socket_timeout=0.5,
+                    socket_connect_timeout=0.5,
+                )
+
+            # Connection pool sizing (per pool)
+            self.POOL_MIN = int(os.getenv("WEB_DB_POOL_MIN", 1))
+            self.POOL_MAX = int(os.getenv("WEB_DB_POOL_MAX", 10))
+            self.POOL_TIMEOUT = float(os.getenv("WEB_DB_POOL_TIMEOUT", 10))
+            self._pools = {}  # "primary" / "replica" -> pool state, created lazily per process
+            self._stats_lock = Lock()
+            self._stats = {
+                "checkouts": 0,
+                "returns": 0,
+                "in_use": 0,
+                "timeouts": 0,
+                "wait_seconds_total": 0.0,
+                "wait_seconds_max": 0.0,
+                "replica_checkouts": 0,
+                "replica_fallbacks": 0,
+                "read_your_writes": 0,
+            }
             self._initialized = True  # mark as initialized
 
-    def _get_connection(self):
-        return psycopg2.connect(self.conn_string)
+    def _get_pool(self, role: str = "primary") -> Dict:
+        """Create a role's connection pool on first use (and again in a forked worker)"""
+        state = self._pools.get(role)
+        if state is None or state["pid"] != os.getpid():
+            with self._lock:
+                state = self._pools.get(role)
+                if state is None or state["pid"] != os.getpid():
+                    conn_string = (
+                        self.read_conn_string if role == "replica" else self.conn_string
+                    )
+                    state = {
+                        "pool": psycopg2.pool.ThreadedConnectionPool(
+                            self.POOL_MIN, self.POOL_MAX, conn_string
+                        ),
+                        # ThreadedConnectionPool raises when exhausted, so requests
+                        # queue on this semaphore instead
+                        "slots": BoundedSemaphore(self.POOL_MAX),
+                        "pid": os.getpid(),
+                    }
+                    self._pools[role] = state
+        return state
+
+    def _route(self, read_only: bool, user_id: Optional[int]) -> str:
+        """Pick the pool for a unit of work: replica for reads unless inside read-your-writes"""
+        if not read_only or not self.read_conn_string:
+            return "primary"
+        if user_id is not None and self._within_write_window(user_id):
+            with self._stats_lock:
+                self._stats["read_your_writes"] += 1
+            return "primary"
+        return "replica"
+
+    def _within_write_window(self, user_id: int) -> bool:
+        last_write = self._last_writes.get(user_id)
+        if last_write and time.monotonic() - last_write < self.READ_YOUR_WRITES_SECONDS:
+            return True
+        if self._redis is None:
+            return False
+        try:
+            return bool(self._redis.exists(f"{READ_YOUR_WRITES_NAMESPACE}:{int(user_id)}"))
+        except Exception as e:
+            # Can't tell whether the user just wrote: the primary is always safe
+            print(f"❌ Read-your-writes lookup failed for user {user_id}: {e}")
+            return True
+
+    def _record_write(self, user_id: int):
+        now = time.monotonic()
+        self._last_writes[user_id] = now
+        if len(self._last_writes) > 10000:
+            # Forget users whose window has passed
+            for key, written_at in list(self._last_writes.items()):
+                if now - written_at >= self.READ_YOUR_WRITES_SECONDS:
+                    self._last_writes.pop(key, None)
+
+        if self._redis is not None:
+            try:
+                self._redis.set(
+                    f"{READ_YOUR_WRITES_NAMESPACE}:{int(user_id)}",
+                    1,
+                    px=int(self.READ_YOUR_WRITES_SECONDS * 1000),
+                )
+            except Exception as e:
+                print(f"❌ Failed to record write for user {user_id}: {e}")
+
+    def _checkout(self, role: str):
+        """Wait for a slot in the role's pool and check a connection out"""
+        state = self._get_pool(role)
+        slots = state["slots"]
+
+        wait_start = time.monotonic()
+        if not slots.acquire(timeout=self.POOL_TIMEOUT):
+            with self._stats_lock:
+                self._stats["timeouts"] += 1
+            raise psycopg2.pool.PoolError(
+                f"Timed out after {self.POOL_TIMEOUT}s waiting for a database connection"
+            )
+        waited = time.monotonic() - wait_start
+
+        try:
+            conn = state["pool"].getconn()
+        except Exception:
+            slots.release()
+            raise
+
+        with self._stats_lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+            if role == "replica":
+                self._stats["replica_checkouts"] += 1
+        return state, conn
+
+    @contextmanager
+    def _get_connection(self, read_only: bool = False, user_id: Optional[int] = None):
+        """
+        Check a connection out of the pool for one unit of work.
+
+        Commits when the block succeeds and rolls back when it raises, like
+        `with psycopg2.connect() as conn` did, then returns the connection.
+
+        Args:
+            read_only (bool): The block only reads, so it may run on the replica
+            user_id (int, optional): User the work is for; writes (read_only=False)
+                open that user's read-your-writes window, restarted on commit
+        """
+        role = self._route(read_only, user_id)
+        if not read_only and user_id is not None:
+            # Open the window before writing too, so reads racing this write
+            # (and caches they fill) never come from the replica
+            self._record_write(user_id)
+        try:
+            state, conn = self._checkout(role)
+        except psycopg2.OperationalError as e:
+            if role != "replica":
+                raise
+            print(f"⚠️  Read replica unavailable, reading from primary: {e}")
+            with self._stats_lock:
+                self._stats["replica_fallbacks"] += 1
+            state, conn = self._checkout("primary")
+
+        try:
+            yield conn
+            conn.commit()
+            if not read_only and user_id is not None:
+                self._record_write(user_id)
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            state["pool"].putconn(conn, close=bool(conn.closed))
+            with self._stats_lock:
+                self._stats["returns"] += 1
+                self._stats["in_use"] -= 1
+            state["slots"].release()
+
+    def get_pool_stats(self) -> Dict:
+        """
+        Connection pool metrics: checkouts/returns, in use, timeouts and wait
+        times, plus replica checkouts, replica fallbacks and reads kept on the
+        primary by the read-your-writes window
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["wait_seconds_avg"] = (
+            stats["wait_seconds_total"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        )
+        stats["pool_min"] = self.POOL_MIN
+        stats["pool_max"] = self.POOL_MAX
+        stats["replica_enabled"] = bool(self.read_conn_string)
+        return stats
 
     def create_user(
         self, name: str, username: str, password: str, phone: int = None
@@ -56,7 +383,6 @@ class UserDB:
                 conn.commit()
                 return True
         except psycopg2.IntegrityError:
-            conn.rollback()
             return False  # Username already exists
 
     def authenticate_user(self, username: str, password: str) -> Optional[Dict]:
@@ -74,6 +400,13 @@ class UserDB:
                 return dict(row) if row else None
 
     def get_user_gmail(self, user_id: int) -> Optional[Dict]:
+        return CacheClient().get_or_load(
+            reference_key(user_id, "gmail"), lambda: self._load_user_gmail(user_id)
+        )
+
+    def _load_user_gmail(self, user_id: int) -> Optional[Dict]:
+        # Cache loaders read the primary: a lagging replica would put stale
+        # data in the shared cache for every worker until it expires
         with self._get_connection() as conn:
             with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
                 cursor.execute(
@@ -104,7 +437,7 @@ class UserDB:
 
     def create_gmail_credential(self, user_id, email, access_token, refresh_token):
         try:
-            with self._get_connection() as conn:
+            with self._get_connection(user_id=user_id) as conn:
                 with conn.cursor() as cursor:
                     cursor.execute(
                         """
@@ -119,14 +452,14 @@ class UserDB:
                         ),
                     )
                 conn.commit()
+                CacheClient().invalidate_user(user_id, "gmail")
                 return True
         except psycopg2.IntegrityError:
-            conn.rollback()
             raise
 
     def create_workflow(self, user_id):
         try:
-            with self._get_connection() as conn:
+            with self._get_connection(user_id=user_id) as conn:
                 with conn.cursor() as cursor:
                     cursor.execute(
                         """
@@ -141,11 +474,10 @@ class UserDB:
                 conn.commit()
                 return True
         except psycopg2.IntegrityError:
-            conn.rollback()
             raise
 
     def get_user_workflow(self, user_id) -> Optional[Dict]:
-        with self._get_connection() as conn:
+        with self._get_connection(read_only=True, user_id=user_id) as conn:
             with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
                 cursor.execute(
                     """
@@ -186,7 +518,7 @@ class UserDB:
             "Others",
         ]
         try:
-            with self._get_connection() as conn:
+            with self._get_connection(user_id=user_id) as conn:
                 with conn.cursor() as cursor:
                     for category in transaction_categories:
                         cursor.execute(
@@ -198,12 +530,33 @@ class UserDB:
                             (user_id, category),
                         )
                 conn.commit()
+                CacheClient().invalidate_user(user_id, "categories")
                 return True
         except Exception as e:
             print(f"❌ Error inserting default categories: {e}")
             raise
 
-    def get_transaction_categories(self, user_id) -> list[str]:
+    def get_transaction_categories(self, user_id, cached: bool = True) -> list[str]:
+        """
+        Active category names for a user
+
+        Args:
+            user_id (int): Category owner
+            cached (bool): Serve from CacheClient. Pass False where the response
+                is tagged with user_data_version (the JSON API): another
+                process's local cache tier can lag a write for up to
+                REFERENCE_CACHE_LOCAL_TTL_SECONDS, and a stale body under the
+                new ETag would then be revalidated with 304s indefinitely.
+        """
+        if not cached:
+            return self._load_transaction_categories(user_id)
+        return CacheClient().get_or_load(
+            reference_key(user_id, "categories"),
+            lambda: self._load_transaction_categories(user_id),
+        )
+
+    def _load_transaction_categories(self, user_id) -> list[str]:
+        # Primary, like _load_user_gmail: fills the shared cache
         with self._get_connection() as conn:
             with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
                 cursor.execute(
@@ -219,7 +572,7 @@ class UserDB:
 
     def create_transaction_category(self, user_id, category):
         try:
-            with self._get_connection() as conn:
+            with self._get_connection(user_id=user_id) as conn:
                 with conn.cursor() as cursor:
                     cursor.execute(
                         """
@@ -230,14 +583,14 @@ class UserDB:
                         (user_id, category),
                     )
                 conn.commit()
+                CacheClient().invalidate_user(user_id, "categories")
                 return True
         except psycopg2.IntegrityError:
-            conn.rollback()
             raise
 
     def delete_transaction_category(self, user_id, category):
         try:
-            with self._get_connection() as conn:
+            with self._get_connection(user_id=user_id) as conn:
                 with conn.cursor() as cursor:
                     cursor.execute(
                         """
@@ -247,17 +600,17 @@ class UserDB:
                         (user_id, category),
                     )
                 conn.commit()
+                CacheClient().invalidate_user(user_id, "categories")
                 return (
                     cursor.rowcount > 0
                 )  # ✅ True if a row was deleted, False otherwise
         except Exception as e:
-            conn.rollback()
             print(f"❌ Error deleting transaction category: {e}")
             raise
 
     def delete_gmail_credential(self, user_id):
         try:
-            with self._get_connection() as conn:
+            with self._get_connection(user_id=user_id) as conn:
                 with conn.cursor() as cursor:
                     cursor.execute(
                         """
@@ -267,17 +620,17 @@ class UserDB:
                         (user_id,),
                     )
                 conn.commit()
+                CacheClient().invalidate_user(user_id, "gmail")
                 return (
                     cursor.rowcount > 0
                 )  # ✅ True if a row was deleted, False otherwise
         except Exception as e:
-            conn.rollback()
             print(f"❌ Error deleting user gmail credentials: {e}")
             raise
 
     def delete_workflow(self, user_id):
         try:
-            with self._get_connection() as conn:
+            with self._get_connection(user_id=user_id) as conn:
                 with conn.cursor() as cursor:
                     cursor.execute(
                         """
@@ -291,11 +644,17 @@ class UserDB:
                     cursor.rowcount > 0
                 )  # ✅ True if a row was deleted, False otherwise
         except Exception as e:
-            conn.rollback()
             print(f"❌ Error deleting user workflow: {e}")
             raise
 
     def get_telegram_info(self, user_id: int) -> Optional[Dict]:
+        return CacheClient().get_or_load(
+            reference_key(user_id, "telegram"),
+            lambda: self._load_telegram_info(user_id),
+        )
+
+    def _load_telegram_info(self, user_id: int) -> Optional[Dict]:
+        # Primary, like _load_user_gmail: fills the shared cache
         with self._get_connection() as conn:
             with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
                 cursor.execute(
@@ -308,24 +667,302 @@ class UserDB:
                 row = cursor.fetchone()
                 return dict(row) if row else None
 
-    def get_user_transactions(self, user_id: int):
-        with self._get_connection() as conn:
+    def get_user_transactions(
+        self,
+        user_id: int,
+        limit: int = TRANSACTION_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        category: Optional[str] = None,
+        transaction_type: Optional[str] = None,
+    ) -> Dict:
+        """
+        One page of a user's transactions, newest first (keyset pagination)
+
+        Args:
+            user_id (int): Owner of the transactions
+            limit (int): Page size, capped at TRANSACTION_PAGE_MAX
+            cursor (str, optional): next_cursor from the previous page
+            start (datetime, optional): Only transactions at or after this instant
+            end (datetime, optional): Only transactions before this instant
+            category (str, optional): Only this transaction_category
+            transaction_type (str, optional): Only 'debit' or 'credit'
+
+        Returns:
+            dict: {"transactions": [...], "next_cursor": str or None}
+        """
+        sql, params = _transaction_page_query(
+            user_id, limit, cursor, start, end, category, transaction_type
+        )
+        with self._get_connection(read_only=True, user_id=user_id) as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                cursor.execute(sql, params)
+                rows = [dict(row) for row in cursor.fetchall()]
+        return _split_transaction_page(rows, limit)
+
+    def iter_user_transactions(
+        self,
+        user_id: int,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        category: Optional[str] = None,
+        transaction_type: Optional[str] = None,
+        chunk_size: int = 5000,
+    ):
+        """
+        Stream all of a user's matching transactions, oldest first, in chunks.
+
+        Uses a named (server-side) cursor, so only one chunk is held in memory
+        at a time. The pooled connection stays checked out until the generator
+        is exhausted or closed.
+
+        Yields:
+            list: Up to chunk_size transaction dicts
+        """
+        conditions, params = _transaction_conditions(
+            user_id, start, end, category, transaction_type
+        )
+        with self._get_connection(read_only=True, user_id=user_id) as conn:
+            with conn.cursor(
+                name=f"export_transactions_{user_id}",
+                cursor_factory=psycopg2.extras.RealDictCursor,
+            ) as cursor:
+                cursor.itersize = chunk_size
+                cursor.execute(
+                    f"""
+                    SELECT {TRANSACTION_COLUMNS} FROM user_transactions
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY transaction_at, id
+                """,
+                    params,
+                )
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    yield [dict(row) for row in rows]
+
+    def search_transactions(
+        self,
+        user_id: int,
+        query: str,
+        limit: int = TRANSACTION_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> Dict:
+        """
+        Fuzzy counterparty search, best match first (keyset pagination)
+
+        Matches counterparties containing the query or with a word similar to
+        it (typos, partial words), through the pg_trgm GIN index. Results are
+        ranked by word_similarity, then newest first.
+
+        Args:
+            user_id (int): Owner of the transactions
+            query (str): Text to look for in counterparty
+            limit (int): Page size, capped at TRANSACTION_PAGE_MAX
+            cursor (str, optional): next_cursor from the previous page
+
+        Returns:
+            dict: {"transactions": [... with "score"], "next_cursor": str or None}
+        """
+        limit = min(int(limit), TRANSACTION_PAGE_MAX)
+        like_pattern = "%" + re.sub(r"([%_\\])", r"\\\1", query) + "%"
+        score_sql = "word_similarity(%s, counterparty)"
+        conditions = ["user_id = %s", "(counterparty ILIKE %s OR %s <%% counterparty)"]
+        params = [query, user_id, like_pattern, query]
+
+        if cursor:
+            score, cursor_at, cursor_id = decode_search_cursor(cursor)
+            conditions.append(f"({score_sql}, transaction_at, id) < (%s::REAL, %s, %s)")
+            params += [query, score, cursor_at, cursor_id]
+
+        with self._get_connection(read_only=True, user_id=user_id) as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                cursor.execute(
+                    f"""
+                    SELECT {TRANSACTION_COLUMNS}, {score_sql} AS score
+                    FROM user_transactions
+                    WHERE {" AND ".join(conditions)}
+                    ORDER BY score DESC, transaction_at DESC, id DESC
+                    LIMIT %s
+                """,
+                    [*params, limit + 1],
+                )
+                rows = [dict(row) for row in cursor.fetchall()]
+
+        transactions = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit and transactions:
+            next_cursor = encode_search_cursor(transactions[-1])
+        return {"transactions": transactions, "next_cursor": next_cursor}
+
+    def get_data_version(self, user_id: int) -> Dict:
+        """
+        The user's change counter, bumped by triggers on every write to data
+        the API serves. Users with no recorded change are at version 0.
+
+        Returns:
+            dict: {"version": int, "updated_at": datetime or None}
+        """
+        with self._get_connection(read_only=True, user_id=user_id) as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                cursor.execute(
+                    "SELECT version, updated_at FROM user_data_version WHERE user_id = %s",
+                    (user_id,),
+                )
+                row = cursor.fetchone()
+                return dict(row) if row else {"version": 0, "updated_at": None}
+
+    def get_workflow_status(self, user_id: int) -> Dict:
+        """
+        Gmail connection, workflow state, latest processed email and current
+        poll interval (None before the first poll) for a user
+        """
+        with self._get_connection(read_only=True, user_id=user_id) as conn:
             with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
                 cursor.execute(
                     """
-                    SELECT * FROM user_transactions
-                    WHERE user_id = %s
+                    SELECT
+                        g.gmail_email,
+                        COALESCE(w.is_active, FALSE) AS is_active,
+                        w.created_at,
+                        m.last_email_datetime,
+                        p.interval_seconds AS poll_interval_seconds
+                    FROM (SELECT %s::INT AS user_id) u
+                    LEFT JOIN LATERAL (
+                        SELECT gmail_email FROM gmail_credentials
+                        WHERE user_id = u.user_id AND is_active = TRUE
+                        LIMIT 1
+                    ) g ON TRUE
+                    LEFT JOIN workflow w ON w.user_id = u.user_id
+                    LEFT JOIN user_email_watermark m ON m.user_id = u.user_id
+                    LEFT JOIN user_poll_schedule p ON p.user_id = u.user_id
                 """,
                     (user_id,),
                 )
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows] if rows else []
+                return dict(cursor.fetchone())
+
+    def get_spending_summary(self, user_id: int, months: int = 12) -> list[Dict]:
+        """
+        Spending totals per month, category and type from user_spending_rollup
+
+        Args:
+            user_id (int): Owner of the transactions
+            months (int): Calendar months (IST) to include, current month first
+
+        Returns:
+            list: [{"month", "transaction_category", "transaction_type",
+                    "total", "transaction_count"}], newest month first
+        """
+        with self._get_connection(read_only=True, user_id=user_id) as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                cursor.execute(
+                    """
+                    SELECT month, transaction_category, transaction_type,
+                           total, transaction_count
+                    FROM user_spending_rollup
+                    WHERE user_id = %s
+                      AND month >= spending_month(now()) - make_interval(months => %s - 1)
+                    ORDER BY month DESC, transaction_type, total DESC
+                """,
+                    (user_id, months),
+                )
+                return [dict(row) for row in cursor.fetchall()]
+
+    def get_dashboard_data(
+        self, user_id: int, limit: int = TRANSACTION_PAGE_SIZE, **filters
+    ) -> Dict:
+        """
+        Everything the dashboard renders, fetched in a single round trip:
+        Gmail connection, workflow, active categories, one page of
+        transactions, total transaction count (from the rollup) and
+        Telegram link. Shapes match the individual getters.
+
+        Args:
+            user_id (int): Dashboard owner
+            limit (int): Transactions page size
+            **filters: cursor, start, end, category, transaction_type
+                (see get_user_transactions)
+        """
+        page_sql, page_params = _transaction_page_query(user_id, limit, **filters)
+        with self._get_connection(read_only=True, user_id=user_id) as conn:
+            with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                cursor.execute(
+                    f"""
+                    SELECT
+                        g.gmail_email,
+                        w.created_at AS workflow_created_at,
+                        COALESCE(c.categories, ARRAY[]::TEXT[]) AS categories,
+                        t.telegram,
+                        COALESCE(tx.transactions, '[]'::JSONB) AS transactions,
+                        COALESCE(r.transaction_count, 0) AS transaction_count
+                    FROM (SELECT %s::INT AS user_id) u
+                    LEFT JOIN LATERAL (
+                        SELECT gmail_email FROM gmail_credentials
+                        WHERE user_id = u.user_id AND is_active = TRUE
+                        LIMIT 1
+                    ) g ON TRUE
+                    LEFT JOIN LATERAL (
+                        SELECT created_at FROM workflow
+                        WHERE user_id = u.user_id AND is_active = TRUE
+                        LIMIT 1
+                    ) w ON TRUE
+                    LEFT JOIN LATERAL (
+                        SELECT array_agg(category ORDER BY id) AS categories
+                        FROM transaction_category
+                        WHERE user_id = u.user_id AND is_active = TRUE
+                    ) c ON TRUE
+                    LEFT JOIN LATERAL (
+                        SELECT row_to_json(ut) AS telegram FROM user_telegram ut
+                        WHERE ut.user_id = u.user_id
+                    ) t ON TRUE
+                    LEFT JOIN LATERAL (
+                        -- amount as text: a JSON number would come back as a float
+                        SELECT jsonb_agg(
+                            to_jsonb(page) || jsonb_build_object('amount', page.amount::TEXT)
+                            ORDER BY transaction_at DESC, id DESC
+                        ) AS transactions
+                        FROM ({page_sql}) page
+                    ) tx ON TRUE
+                    LEFT JOIN LATERAL (
+                        SELECT SUM(transaction_count) AS transaction_count
+                        FROM user_spending_rollup
+                        WHERE user_id = u.user_id
+                    ) r ON TRUE
+                    """,
+                    [user_id, *page_params],
+                )
+                row = cursor.fetchone()
+
+        transactions = list(row["transactions"])
+        for transaction in transactions:
+            # JSON carries these as text, restore the column types
+            transaction["amount"] = Decimal(transaction["amount"])
+            transaction["transaction_at"] = datetime.fromisoformat(
+                transaction["transaction_at"]
+            )
+
+        return {
+            "user_gmail": (
+                {"gmail_email": row["gmail_email"]} if row["gmail_email"] else None
+            ),
+            "user_workflow": (
+                {"created_at": row["workflow_created_at"]}
+                if row["workflow_created_at"]
+                else None
+            ),
+            "transaction_categories": list(row["categories"]),
+            **_split_transaction_page(transactions, limit),
+            "transaction_count": int(row["transaction_count"]),
+            "telegram": row["telegram"],
+        }
 
 
 if __name__ == "__main__":
     db = UserDB()
     t = db.get_user_transactions(11)
-    print(t)
+    print(t["transactions"], t["next_cursor"])
     # user_gmail = db.get_user_gmail(user_id=user_id)
     # user_workflow = db.get_user_workflow(user_id=user_id)
     # # data = db.get_transaction_categories(user_id=3)
@@ -1,17 +1,28 @@
 import logging
 from flask import (
     Flask,
+    Response,
     request,
     redirect,
     render_template,
     jsonify,
+    make_response,
     session,
     flash,
+    stream_with_context,
     url_for,
 )
+import hashlib
+from datetime import datetime, timedelta
 from functools import wraps
-from web_app.database_client import UserDB
+from web_app.database_client import (
+    UserDB,
+    TRANSACTION_PAGE_SIZE,
+    decode_transaction_cursor,
+)
 from web_app.oauth_handler import GoogleOAuth
+from web_app.transaction_export import EXPORT_FORMATS, export_transactions
+from workflow.statement_import import import_statement
 import pytz
 
 
@@ -30,6 +41,57 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+@app.template_filter("ist")
+def format_ist(value, fmt="%d %b %Y"):
+    """Format a datetime in IST for templates (naive values are treated as UTC)"""
+    if not value:
+        return ""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=pytz.UTC)
+    return value.astimezone(pytz.timezone("Asia/Kolkata")).strftime(fmt)
+
+
+def parse_transaction_filters(args):
+    """
+    Transaction list filters from query-string args.
+
+    `start` / `end` are inclusive IST dates (YYYY-MM-DD); `type` is debit or
+    credit; `cursor` must be a next_cursor we issued. Raises ValueError for
+    malformed values, before any query runs.
+
+    Returns:
+        dict: cursor, start, end, category, transaction_type (only those set)
+    """
+    ist = pytz.timezone("Asia/Kolkata")
+    filters = {}
+
+    if args.get("cursor"):
+        decode_transaction_cursor(args["cursor"])
+        filters["cursor"] = args["cursor"]
+    if args.get("start"):
+        start_date = datetime.strptime(args["start"], "%Y-%m-%d")
+        filters["start"] = ist.localize(start_date)
+    if args.get("end"):
+        end_date = datetime.strptime(args["end"], "%Y-%m-%d") + timedelta(days=1)
+        filters["end"] = ist.localize(end_date)
+    if args.get("category"):
+        filters["category"] = args["category"]
+    if args.get("type"):
+        if args["type"] not in ("debit", "credit"):
+            raise ValueError(f"Invalid transaction type: {args['type']}")
+        filters["transaction_type"] = args["type"]
+    return filters
+
+
+def serialize_transaction(transaction):
+    """JSON-safe copy of a transaction row"""
+    return {
+        **transaction,
+        "amount": str(transaction["amount"]),
+        "transaction_at": transaction["transaction_at"].isoformat(),
+    }
+
+
 def login_required(f):
     """Decorator to require login for routes"""
 
@@ -43,6 +105,49 @@ def login_required(f):
     return decorated_function
 
 
+def conditional_on_user_data(f):
+    """
+    Decorator for read-only JSON endpoints: ETag / Last-Modified from the
+    user's change counter, and 304 Not Modified before running the view
+    when the client's copy is current. Apply below @login_required.
+    """
+
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user_id = session.get("user_id")
+        data_version = db.get_data_version(user_id=user_id)
+
+        # Same version, different filters -> different body, so hash the query too
+        query_hash = hashlib.sha1(request.query_string).hexdigest()[:12]
+        etag = f"{request.endpoint}-{user_id}-{data_version['version']}-{query_hash}"
+        last_modified = data_version["updated_at"]
+
+        not_modified = (
+            request.if_none_match.contains_weak(etag)
+            if request.if_none_match
+            else bool(
+                last_modified
+                and request.if_modified_since
+                and last_modified.replace(microsecond=0) <= request.if_modified_since
+            )
+        )
+        if not_modified:
+            response = make_response("", 304)
+        else:
+            response = make_response(f(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+        response.set_etag(etag, weak=True)
+        if last_modified:
+            response.last_modified = last_modified
+        # Browsers may keep the body but must revalidate before reusing it
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    return decorated_function
+
+
 @app.route("/")
 def home():
     if "user_id" in session:
@@ -154,9 +259,19 @@ def dashboard():
     username = session.get("username")
     full_name = session.get("name")
 
+    try:
+        transaction_filters = parse_transaction_filters(request.args)
+    except ValueError as e:
+        logger.warning("Ignoring invalid transaction filters: %s", e)
+        flash(str(e), "error")
+        transaction_filters = {}
+
+    # Gmail, workflow, categories, a page of transactions and telegram in one round trip
+    dashboard_data = db.get_dashboard_data(user_id=user_id, **transaction_filters)
+
     # workflow info
-    user_gmail = db.get_user_gmail(user_id=user_id) or {}
-    user_workflow = db.get_user_workflow(user_id=user_id) or {}
+    user_gmail = dashboard_data["user_gmail"] or {}
+    user_workflow = dashboard_data["user_workflow"] or {}
     user_data = {**user_gmail, **user_workflow}
 
     # Convert datetime to IST and format (assuming created_at is always datetime)
@@ -172,11 +287,19 @@ def dashboard():
         user_data["created_at"] = ist_time.strftime("%B %d, %Y · %I:%M %p")
 
     # transaction info
-    user_transaction_categories = db.get_transaction_categories(user_id=user_id)
-    user_transactions = db.get_user_transactions(user_id=user_id)
+    user_transaction_categories = dashboard_data["transaction_categories"]
+    user_transactions = dashboard_data["transactions"]
+    next_cursor = dashboard_data["next_cursor"]
+    transaction_count = dashboard_data["transaction_count"]
+    # Query args for the filter form and the "older" link (without the cursor)
+    filter_args = {
+        key: request.args[key]
+        for key in ("start", "end", "category", "type")
+        if request.args.get(key)
+    }
 
     # telegram info
-    telegram_data = db.get_telegram_info(user_id=user_id)
+    telegram_data = dashboard_data["telegram"]
 
     logger.info("Dashboard accessed by user %s (ID: %s)", username, user_id)
     return render_template(
@@ -186,10 +309,42 @@ def dashboard():
         user_data=user_data,
         user_transaction_categories=user_transaction_categories,
         user_transactions=user_transactions,
+        next_cursor=next_cursor,
+        transaction_count=transaction_count,
+        filter_args=filter_args,
         telegram_data=telegram_data,
     )
 
 
+@app.route("/api/transactions")
+@login_required
+@conditional_on_user_data
+def api_transactions():
+    """
+    Paginated transactions as JSON, newest first.
+
+    Query args: cursor, limit, start, end (IST dates), category, type.
+    Pass the returned next_cursor back as `cursor` to get the following page.
+    """
+    user_id = session.get("user_id")
+    try:
+        filters = parse_transaction_filters(request.args)
+        limit = int(request.args.get("limit", TRANSACTION_PAGE_SIZE))
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        page = db.get_user_transactions(user_id=user_id, limit=limit, **filters)
+    except ValueError as e:
+        logger.warning("Bad /api/transactions request from user ID %s: %s", user_id, e)
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(
+        {
+            "transactions": [serialize_transaction(t) for t in page["transactions"]],
+            "next_cursor": page["next_cursor"],
+        }
+    )
+
+
 @app.route("/auth")
 @login_required
 def auth():
@@ -293,6 +448,34 @@ def delete_transaction_category():
         return redirect(url_for("dashboard"))
 
 
+@app.route("/import_statement", methods=["POST"])
+@login_required
+def upload_statement():
+    user_id = session.get("user_id")
+    statement = request.files.get("statement")
+
+    if not statement or not statement.filename:
+        error_msg = "Missing statement file!"
+        logger.error(error_msg)
+        flash(f"{error_msg}", "error")
+        return redirect(url_for("dashboard"))
+
+    try:
+        result = import_statement(user_id=user_id, source=statement.stream)
+    except Exception as e:
+        logger.exception("Statement import failed for user ID %s", user_id)
+        flash(f"Statement import failed: {str(e)}", "error")
+        return redirect(url_for("dashboard"))
+
+    logger.info("Imported statement for user ID %s: %s", user_id, result)
+    flash(
+        f"Imported {result['imported']} transactions "
+        f"({result['duplicates']} already present, {result['skipped']} unreadable rows skipped)",
+        "success",
+    )
+    return redirect(url_for("dashboard"))
+
+
 @app.route("/disconnect_gmail_workflow", methods=["GET"])
 @login_required
 def disconnect_gmail_workflow():
@@ -308,5 +491,143 @@ def disconnect_gmail_workflow():
     return redirect(url_for("dashboard"))
 
 
+@app.route("/api/transactions/search")
+@login_required
+@conditional_on_user_data
+def api_search_transactions():
+    """
+    Fuzzy counterparty search, best match first, paginated.
+
+    Query args: q (required), cursor, limit. Pass the returned next_cursor
+    back as `cursor` to get the following page.
+    """
+    user_id = session.get("user_id")
+    query = request.args.get("q", "").strip()
+    try:
+        if not query or len(query) > 100:
+            raise ValueError("q must be between 1 and 100 characters")
+        limit = int(request.args.get("limit", TRANSACTION_PAGE_SIZE))
+        if limit < 1:
+            raise ValueError("limit must be positive")
+        page = db.search_transactions(
+            user_id=user_id,
+            query=query,
+            limit=limit,
+            cursor=request.args.get("cursor"),
+        )
+    except ValueError as e:
+        logger.warning("Bad transaction search from user ID %s: %s", user_id, e)
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify(
+        {
+            "transactions": [serialize_transaction(t) for t in page["transactions"]],
+            "next_cursor": page["next_cursor"],
+        }
+    )
+
+
+@app.route("/export/transactions")
+@login_required
+def export_user_transactions():
+    """
+    Download transactions as CSV (default) or Parquet, streamed in chunks.
+
+    Query args: format (csv / parquet), start, end (IST dates), category, type.
+    """
+    user_id = session.get("user_id")
+    export_format = request.args.get("format", "csv")
+    try:
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {export_format}")
+        filters = parse_transaction_filters(request.args)
+        filters.pop("cursor", None)
+        chunks = export_transactions(user_id, export_format, **filters)
+    except (ValueError, RuntimeError) as e:
+        logger.warning("Bad transaction export request from user ID %s: %s", user_id, e)
+        return jsonify({"error": str(e)}), 400
+
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    logger.info("Streaming %s transaction export for user ID %s", export_format, user_id)
+    # No Content-Length, so the body goes out with chunked transfer encoding
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={
+            "Content-Disposition": f"attachment; filename=transactions.{extension}"
+        },
+    )
+
+
+@app.route("/api/summary")
+@login_required
+@conditional_on_user_data
+def api_summary():
+    """
+    Monthly spending totals per category and type, newest month first.
+
+    Query args: months (default 12, max 60). Reads the incrementally
+    maintained rollup, so cost depends on months requested, not history size.
+    """
+    user_id = session.get("user_id")
+    try:
+        months = int(request.args.get("months", 12))
+        if not 1 <= months <= 60:
+            raise ValueError("months must be between 1 and 60")
+    except ValueError as e:
+        logger.warning("Bad /api/summary request from user ID %s: %s", user_id, e)
+        return jsonify({"error": str(e)}), 400
+
+    summary = db.get_spending_summary(user_id=user_id, months=months)
+    return jsonify(
+        {
+            "summary": [
+                {
+                    **row,
+                    "month": row["month"].strftime("%Y-%m"),
+                    "total": str(row["total"]),
+                }
+                for row in summary
+            ]
+        }
+    )
+
+
+@app.route("/api/categories")
+@login_required
+@conditional_on_user_data
+def api_categories():
+    """Active transaction categories"""
+    user_id = session.get("user_id")
+    # Straight from the database: the body must be at least as new as the ETag
+    return jsonify(
+        {"categories": db.get_transaction_categories(user_id=user_id, cached=False)}
+    )
+
+
+@app.route("/api/workflow")
+@login_required
+@conditional_on_user_data
+def api_workflow():
+    """Gmail connection and workflow status"""
+    user_id = session.get("user_id")
+    status = db.get_workflow_status(user_id=user_id)
+    return jsonify(
+        {
+            "gmail_email": status["gmail_email"],
+            "is_active": status["is_active"],
+            "created_at": (
+                status["created_at"].isoformat() if status["created_at"] else None
+            ),
+            "last_email_datetime": (
+                status["last_email_datetime"].isoformat()
+                if status["last_email_datetime"]
+                else None
+            ),
+            "poll_interval_seconds": status["poll_interval_seconds"],
+        }
+    )
+
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000, host="0.0.0.0", ssl_context="adhoc")
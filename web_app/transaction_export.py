@@ -0,0 +1,181 @@
+"""
+Streaming export of a user's transactions to CSV or Parquet.
+
+Rows come from a server-side cursor in chunks and each chunk is encoded and
+handed on before the next is fetched, so memory stays flat however many
+years of history a user has. Parquet needs the optional `pyarrow` package.
+
+Usage:
+    python -m web_app.transaction_export --user-id 11 --format csv -o transactions.csv
+    python -m web_app.transaction_export --user-id 11 --format parquet \\
+        --start 2024-04-01 --end 2025-03-31 -o fy2024.parquet
+"""
+
+import argparse
+import csv
+import io
+import sys
+from datetime import datetime, timedelta
+import pytz
+from web_app.database_client import UserDB
+
+EXPORT_COLUMNS = [
+    "id",
+    "transaction_id",
+    "transaction_type",
+    "amount",
+    "counterparty",
+    "transaction_category",
+    "transaction_at",
+]
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def iter_csv(chunks):
+    """Encode chunks of transaction dicts as CSV text, header first"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(EXPORT_COLUMNS)
+
+    for rows in chunks:
+        for row in rows:
+            values = [row[column] for column in EXPORT_COLUMNS]
+            values[-1] = row["transaction_at"].isoformat()
+            writer.writerow(values)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Header only when there were no rows
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands bytes back to the caller instead of storing them"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_parquet(chunks):
+    """
+    Encode chunks of transaction dicts as Parquet bytes, one row group per chunk.
+
+    Raises RuntimeError right away (not on first iteration) if pyarrow is missing.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)") from e
+
+    return _parquet_chunks(chunks, pa, pq)
+
+
+def _parquet_chunks(chunks, pa, pq):
+    schema = pa.schema(
+        [
+            ("id", pa.int64()),
+            ("transaction_id", pa.string()),
+            ("transaction_type", pa.string()),
+            ("amount", pa.decimal128(14, 2)),
+            ("counterparty", pa.string()),
+            ("transaction_category", pa.string()),
+            ("transaction_at", pa.timestamp("us", tz="UTC")),
+        ]
+    )
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for rows in chunks:
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    # Footer
+    yield sink.drain()
+
+
+def export_transactions(user_id, export_format="csv", chunk_size=5000, **filters):
+    """
+    Stream a user's transactions, oldest first, in the requested format
+
+    Args:
+        user_id (int): Owner of the transactions
+        export_format (str): "csv" or "parquet"
+        chunk_size (int): Rows fetched from the server-side cursor per round trip
+        **filters: start, end, category, transaction_type (see UserDB.get_user_transactions)
+
+    Returns:
+        generator: str chunks for CSV, bytes chunks for Parquet
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    chunks = UserDB().iter_user_transactions(user_id, chunk_size=chunk_size, **filters)
+    if export_format == "parquet":
+        return iter_parquet(chunks)
+    return iter_csv(chunks)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Export a user's transactions")
+    arg_parser.add_argument("--user-id", type=int, required=True)
+    arg_parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="csv")
+    arg_parser.add_argument("--start", help="First IST date to include (YYYY-MM-DD)")
+    arg_parser.add_argument("--end", help="Last IST date to include (YYYY-MM-DD)")
+    arg_parser.add_argument("--chunk-size", type=int, default=5000)
+    arg_parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    args = arg_parser.parse_args()
+
+    ist = pytz.timezone("Asia/Kolkata")
+    filters = {}
+    if args.start:
+        filters["start"] = ist.localize(datetime.strptime(args.start, "%Y-%m-%d"))
+    if args.end:
+        end_date = datetime.strptime(args.end, "%Y-%m-%d") + timedelta(days=1)
+        filters["end"] = ist.localize(end_date)
+
+    chunks = export_transactions(
+        args.user_id, args.format, chunk_size=args.chunk_size, **filters
+    )
+    if args.format == "csv":
+        output = open(args.output, "w", newline="") if args.output else sys.stdout
+    else:
+        output = open(args.output, "wb") if args.output else sys.stdout.buffer
+
+    try:
+        for chunk in chunks:
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Celery application for the expense-tracker workflow.
+
+A beat schedule queues a run for every user with an active workflow row whose
+poll is due, dispatches queued runs fairly across users (workflow/fair_queue.py)
+and runs the daily workflow_run partition maintenance. Each run is a
+pipeline of stage tasks (see workflow/pipeline.py), one queue per stage, so
+every stage gets its own worker pool:
+
+Usage:
+    celery -A workflow.celery_app worker -Q celery,fetch -c 4 -n fetch@%h
+    celery -A workflow.celery_app worker -Q classify -c 16 -n classify@%h
+    celery -A workflow.celery_app worker -Q categorize -c 32 -n categorize@%h
+    python -m workflow.telegram_router  # exactly one: routes Telegram replies
+    celery -A workflow.celery_app worker -Q persist -c 4 -n persist@%h
+    celery -A workflow.celery_app beat --loglevel=INFO
+"""
+
+import os
+from celery import Celery
+from celery.schedules import crontab
+from dotenv import load_dotenv
+
+load_dotenv()
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# Seconds between fan-outs, i.e. how often due polls are checked (each user's own
+# interval lives in user_poll_schedule)
+WORKFLOW_POLL_INTERVAL_SECONDS = int(os.getenv("WORKFLOW_POLL_INTERVAL_SECONDS", 60))
+
+app = Celery(
+    "mony",
+    broker=os.getenv("CELERY_BROKER_URL", REDIS_URL),
+    backend=os.getenv("CELERY_RESULT_BACKEND", REDIS_URL),
+    include=["workflow.tasks", "workflow.pipeline"],
+)
+
+# How often the fair queue hands jobs to the broker (see workflow/fair_queue.py)
+WORKFLOW_DISPATCH_INTERVAL_SECONDS = int(os.getenv("WORKFLOW_DISPATCH_INTERVAL_SECONDS", 5))
+
+# Stage queues, in pipeline order
+PIPELINE_QUEUES = ["fetch", "classify", "categorize", "persist"]
+
+app.conf.update(
+    timezone="Asia/Kolkata",
+    enable_utc=True,
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    # Runs are I/O bound (Gmail, OpenAI, Telegram polling), so use more
+    # processes than cores; each one holds at most DB_POOL_MAX connections
+    worker_concurrency=int(os.getenv("CELERY_CONCURRENCY", 8)),
+    # Long tasks: don't let one worker reserve runs another could start now
+    worker_prefetch_multiplier=int(os.getenv("CELERY_PREFETCH_MULTIPLIER", 1)),
+    # Acknowledge after the run so a killed worker's run is redelivered
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # Telegram category selection can block for a minute; cap runaway runs
+    task_soft_time_limit=int(os.getenv("WORKFLOW_TASK_SOFT_TIME_LIMIT", 240)),
+    task_time_limit=int(os.getenv("WORKFLOW_TASK_TIME_LIMIT", 300)),
+    result_expires=int(os.getenv("CELERY_RESULT_EXPIRES_SECONDS", 3600)),
+    broker_transport_options={
+        # Must exceed task_time_limit, or acks_late runs are redelivered mid-run
+        "visibility_timeout": int(os.getenv("CELERY_VISIBILITY_TIMEOUT", 3600)),
+    },
+    task_routes={
+        f"workflow.pipeline.{queue}": {"queue": queue} for queue in PIPELINE_QUEUES
+    },
+    beat_schedule={
+        "enqueue-active-user-workflows": {
+            "task": "workflow.tasks.enqueue_active_user_workflows",
+            "schedule": WORKFLOW_POLL_INTERVAL_SECONDS,
+        },
+        "dispatch-workflow-jobs": {
+            "task": "workflow.tasks.dispatch_workflow_jobs",
+            "schedule": WORKFLOW_DISPATCH_INTERVAL_SECONDS,
+        },
+        "maintain-workflow-run-partitions": {
+            "task": "workflow.tasks.maintain_partitions",
+            "schedule": crontab(hour=3, minute=0),
+        },
+    },
+)
@@ -0,0 +1,167 @@
+from psycopg.rows import dict_row
+from psycopg_pool import AsyncConnectionPool
+from workflow.client.postgres_client import build_upsert_sql
+import os
+
+
+class AsyncPostgresClient:
+    """
+    asyncio-native counterpart of PostgresClient (psycopg 3 + AsyncConnectionPool).
+
+    Exposes the same execute_query / insert_or_update semantics, so async
+    workflow code can await DB I/O instead of blocking the event loop. Unlike
+    PostgresClient this is not a singleton: an async pool belongs to the event
+    loop it was opened on, so create one per loop (e.g. per worker process).
+
+        async with AsyncPostgresClient.from_env() as pg:
+            rows = await pg.execute_query("SELECT 1 AS ok")
+    """
+
+    def __init__(self, dsn=None, **kwargs):
+        """
+        Build the (unopened) connection pool
+
+        Pool sizing can be passed as kwargs or taken from the environment:
+            minconn (DB_POOL_MIN, default 1): connections opened up front
+            maxconn (DB_POOL_MAX, default 10): hard cap on open connections
+            pool_timeout (DB_POOL_TIMEOUT, default 30): seconds to wait for a free connection
+        """
+        if dsn:
+            self.dsn = dsn
+        else:
+            # Build DSN from individual parameters
+            host = kwargs.get("host", "localhost")
+            port = kwargs.get("port", 5432)
+            database = kwargs.get("database")
+            user = kwargs.get("user")
+            password = kwargs.get("password")
+
+            self.dsn = f"host={host} port={port} dbname={database} user={user} password={password}"
+
+        self.minconn = int(kwargs.get("minconn", os.getenv("DB_POOL_MIN", 1)))
+        self.maxconn = int(kwargs.get("maxconn", os.getenv("DB_POOL_MAX", 10)))
+        self.pool_timeout = float(
+            kwargs.get("pool_timeout", os.getenv("DB_POOL_TIMEOUT", 30))
+        )
+
+        self._pool = AsyncConnectionPool(
+            self.dsn,
+            min_size=self.minconn,
+            max_size=self.maxconn,
+            timeout=self.pool_timeout,
+            # No per-checkout ping; broken connections are discarded when returned
+            kwargs={"autocommit": True, "row_factory": dict_row},
+            open=False,
+        )
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """Build a client configured from the DB_* environment variables"""
+        return cls(
+            host=os.getenv("DB_HOST", "localhost"),
+            port=os.getenv("DB_PORT", 5432),
+            database=os.getenv("DB_NAME"),
+            user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"),
+            **kwargs,
+        )
+
+    async def open(self):
+        """Open the pool and wait for minconn connections"""
+        await self._pool.open(wait=True)
+        return self
+
+    async def close(self):
+        """Close all pooled database connections"""
+        try:
+            await self._pool.close()
+        except Exception as e:
+            print(f"❌ Error closing connection pool: {e}")
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def get_pool_stats(self):
+        """
+        Return a snapshot of the connection pool metrics
+
+        Returns:
+            dict: psycopg_pool stats (pool_size, pool_available, requests_waiting,
+                  requests_num, requests_wait_ms, ...) plus the configured sizing
+        """
+        stats = dict(self._pool.get_stats())
+        stats["minconn"] = self.minconn
+        stats["maxconn"] = self.maxconn
+        return stats
+
+    async def insert_or_update(
+        self, table, data, conflict_columns=None, pk_column="id"
+    ):
+        """
+        Insert or upsert a row using PostgreSQL ON CONFLICT and return the primary key.
+
+        Args:
+            table (str): Table name
+            data (dict): Column-value mapping
+            conflict_columns (str/list/tuple, optional): Column(s) to handle conflict
+            pk_column (str): Primary key column to return (default "id")
+
+        Returns:
+            int: The primary key of the inserted/updated row
+        """
+        try:
+            if not data:
+                raise ValueError("Data dictionary cannot be empty")
+
+            columns = list(data.keys())
+            values = [data[col] for col in columns]
+            sql, select_sql, conflict_cols = build_upsert_sql(
+                table, columns, conflict_columns, pk_column
+            )
+
+            async with self._pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(sql, values)
+                    result = await cur.fetchone()
+                    if result or not select_sql:
+                        return result[pk_column]
+
+                    # DO NOTHING conflict happened, fetch existing row's PK
+                    await cur.execute(select_sql, [data[c] for c in conflict_cols])
+                    existing = await cur.fetchone()
+                    return existing[pk_column] if existing else None
+
+        except Exception as e:
+            print(f"❌ Error in insert_or_update: {e}")
+            return None
+
+    async def execute_query(self, query, params=None):
+        """
+        Execute a SQL query and return results
+
+        Args:
+            query (str): SQL query string
+            params (tuple): Optional parameters for parameterized queries
+
+        Returns:
+            list: List of dictionaries for SELECT queries, empty list for others
+        """
+        try:
+            async with self._pool.connection() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute(query, params or None)
+
+                    # No result set for INSERT, UPDATE, DELETE, CREATE, etc.
+                    if cur.description is None:
+                        return []
+                    return await cur.fetchall()
+
+        except Exception as e:
+            print(f"❌ Error executing query: {e}")
+            print(f"Query: {query}")
+            if params:
+                print(f"Params: {params}")
+            return []
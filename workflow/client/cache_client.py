@@ -0,0 +1,313 @@
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+import json
+import os
+import threading
+import time
+
+NAMESPACE = "mony:ref"
+
+# Invalidations bump a per-key generation; it only has to outlive a load
+GENERATION_TTL_SECONDS = 86400
+
+# KEYS: value key, generation key; ARGV: expected generation, value, ttl_ms
+_SET_IF_GENERATION_SCRIPT = """
+if (redis.call("GET", KEYS[2]) or "0") ~= ARGV[1] then
+    return 0
+end
+redis.call("SET", KEYS[1], ARGV[2], "PX", ARGV[3])
+return 1
+"""
+
+
+def reference_key(user_id, name):
+    """Cache key for one piece of a user's reference data (e.g. "categories")"""
+    return f"{NAMESPACE}:{int(user_id)}:{name}"
+
+
+def _generation_key(key):
+    return f"{key}:gen"
+
+
+def _encode_default(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"__decimal__": str(value)}
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+
+def _decode_hook(obj):
+    if "__datetime__" in obj:
+        return datetime.fromisoformat(obj["__datetime__"])
+    if "__decimal__" in obj:
+        return Decimal(obj["__decimal__"])
+    return obj
+
+
+class CacheClient:
+    """
+    Read-through cache for small, rarely changing per-user data.
+
+    Two tiers: an in-process LRU with a short TTL, and an optional Redis tier
+    (REDIS_URL) shared by the web app and workflow workers. Writers call
+    delete() / invalidate_user() after committing; the local TTL bounds how
+    long another process can keep serving its own copy. Redis failures are
+    logged and treated as misses, so the database stays the source of truth.
+
+    Every delete also bumps the key's generation. A value loaded from the
+    database is only stored if the generation is unchanged since before the
+    load, so a load racing an invalidation can't put the old value back.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls, *args, **kwargs):
+        """Ensure only one instance is created (thread-safe singleton)"""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super(CacheClient, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self, redis_url=None, **kwargs):
+        """
+        Configure the cache once
+
+        Options can be passed as kwargs or taken from the environment:
+            redis_url (REDIS_URL): enables the shared Redis tier when set
+            ttl_seconds (REFERENCE_CACHE_TTL_SECONDS, default 300): Redis TTL
+            local_ttl_seconds (REFERENCE_CACHE_LOCAL_TTL_SECONDS, default 30): in-process TTL
+            max_entries (REFERENCE_CACHE_MAX_ENTRIES, default 10000): in-process LRU size
+        """
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+
+            self.ttl_seconds = float(
+                kwargs.get("ttl_seconds", os.getenv("REFERENCE_CACHE_TTL_SECONDS", 300))
+            )
+            self.local_ttl_seconds = float(
+                kwargs.get(
+                    "local_ttl_seconds",
+                    os.getenv("REFERENCE_CACHE_LOCAL_TTL_SECONDS", 30),
+                )
+            )
+            self.max_entries = int(
+                kwargs.get("max_entries", os.getenv("REFERENCE_CACHE_MAX_ENTRIES", 10000))
+            )
+
+            self._entries = OrderedDict()  # key -> (expires_at, value)
+            self._entries_lock = threading.Lock()
+            # Bumped by every local delete; guards the in-process tier
+            self._local_generation = 0
+            self._stats = {
+                "local_hits": 0,
+                "redis_hits": 0,
+                "misses": 0,
+                "invalidations": 0,
+                "redis_errors": 0,
+                "stale_writes_skipped": 0,
+            }
+
+            redis_url = redis_url or os.getenv("REDIS_URL")
+            self._redis = None
+            if redis_url:
+                import redis
+
+                self._redis = redis.Redis.from_url(
+                    redis_url, socket_timeout=0.5, socket_connect_timeout=0.5
+                )
+            self._initialized = True
+
+    @classmethod
+    def reset_instance(cls):
+        """Reset singleton instance (useful for testing)"""
+        with cls._lock:
+            cls._instance = None
+            cls._initialized = False
+
+    def _count(self, key):
+        with self._entries_lock:
+            self._stats[key] += 1
+
+    def _get_local(self, key):
+        with self._entries_lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def _set_local(self, key, value, generation=None):
+        with self._entries_lock:
+            if generation is not None and generation != self._local_generation:
+                return False
+            self._entries[key] = (time.monotonic() + self.local_ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def get(self, key):
+        """
+        Look a key up in the local tier, then Redis
+
+        Returns:
+            tuple: (hit, value). A cached None is a hit.
+        """
+        hit, value = self._get_local(key)
+        if hit:
+            self._count("local_hits")
+            return True, value
+
+        if self._redis is not None:
+            try:
+                raw = self._redis.get(key)
+            except Exception as e:
+                print(f"❌ Redis cache read failed for {key}: {e}")
+                self._count("redis_errors")
+                raw = None
+            if raw is not None:
+                value = json.loads(raw, object_hook=_decode_hook)["value"]
+                self._set_local(key, value)
+                self._count("redis_hits")
+                return True, value
+
+        self._count("misses")
+        return False, None
+
+    def generations(self, keys):
+        """
+        Snapshot the generation of each key; take it before reading the
+        source of truth and pass it to set()
+
+        Returns:
+            dict: key -> generation token
+        """
+        keys = list(keys)
+        with self._entries_lock:
+            local_generation = self._local_generation
+
+        redis_generations = [None] * len(keys)
+        if self._redis is not None and keys:
+            try:
+                redis_generations = [
+                    (raw or b"0").decode()
+                    for raw in self._redis.mget([_generation_key(key) for key in keys])
+                ]
+            except Exception as e:
+                print(f"❌ Redis cache generation read failed for {keys}: {e}")
+                self._count("redis_errors")
+        return {
+            key: (local_generation, redis_generation)
+            for key, redis_generation in zip(keys, redis_generations)
+        }
+
+    def set(self, key, value, ttl_seconds=None, generation=None):
+        """
+        Store a value in both tiers (None is cached too)
+
+        Args:
+            key (str): Cache key
+            value: JSON-serializable value (datetime and Decimal allowed)
+            ttl_seconds (float, optional): Redis TTL override
+            generation (tuple, optional): Token from generations(); the value is
+                dropped from each tier whose key was invalidated since
+        """
+        if generation is None:
+            local_generation, redis_generation = None, None
+        else:
+            local_generation, redis_generation = generation
+
+        if not self._set_local(key, value, local_generation):
+            self._count("stale_writes_skipped")
+
+        if self._redis is None:
+            return
+        if generation is not None and redis_generation is None:
+            # Generation unknown (Redis was unreachable), so the write can't be checked
+            return
+
+        payload = json.dumps({"value": value}, default=_encode_default)
+        ttl_ms = int((ttl_seconds or self.ttl_seconds) * 1000)
+        try:
+            if generation is None:
+                self._redis.set(key, payload, px=ttl_ms)
+            elif not self._redis.eval(
+                _SET_IF_GENERATION_SCRIPT,
+                2,
+                key,
+                _generation_key(key),
+                redis_generation,
+                payload,
+                ttl_ms,
+            ):
+                self._count("stale_writes_skipped")
+        except Exception as e:
+            print(f"❌ Redis cache write failed for {key}: {e}")
+            self._count("redis_errors")
+
+    def get_or_load(self, key, loader, ttl_seconds=None):
+        """
+        Return the cached value for key, or call loader() and cache its result
+
+        The result is only cached if key wasn't invalidated while loading.
+
+        Args:
+            key (str): Cache key, see reference_key()
+            loader (callable): Zero-argument function reading the source of truth
+            ttl_seconds (float, optional): Redis TTL override
+
+        Returns:
+            The cached or freshly loaded value
+        """
+        hit, value = self.get(key)
+        if hit:
+            return value
+
+        generation = self.generations([key])[key]
+        value = loader()
+        self.set(key, value, ttl_seconds, generation=generation)
+        return value
+
+    def delete(self, *keys):
+        """Drop keys from both tiers; call after the write has committed"""
+        if not keys:
+            return
+        with self._entries_lock:
+            for key in keys:
+                self._entries.pop(key, None)
+            self._local_generation += 1
+            self._stats["invalidations"] += len(keys)
+        if self._redis is not None:
+            try:
+                pipe = self._redis.pipeline()
+                for key in keys:
+                    pipe.incr(_generation_key(key))
+                    pipe.expire(_generation_key(key), GENERATION_TTL_SECONDS)
+                pipe.delete(*keys)
+                pipe.execute()
+            except Exception as e:
+                print(f"❌ Redis cache delete failed for {keys}: {e}")
+                self._count("redis_errors")
+
+    def invalidate_user(self, user_id, *names):
+        """Drop the named reference entries (e.g. "categories") for one user"""
+        self.delete(*[reference_key(user_id, name) for name in names])
+
+    def get_stats(self):
+        """Hit / miss / invalidation counters and the local tier size"""
+        with self._entries_lock:
+            stats = dict(self._stats)
+            stats["local_entries"] = len(self._entries)
+        stats["redis_enabled"] = self._redis is not None
+        return stats
@@ -1,5 +1,7 @@
 import base64
+import os
 import threading
+from collections import OrderedDict
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from googleapiclient.discovery import build
@@ -8,21 +10,37 @@ from datetime import datetime, timezone, timedelta
 
 
 class GmailClient:
-    _instance = None
-    _instance_lock = threading.Lock()  # ensures singleton creation
-    _lock = threading.Lock()  # ensures thread-safety for API calls
-
-    def __new__(cls, *args, **kwargs):
-        """Ensure only one instance exists (singleton)."""
-        if not cls._instance:
-            with cls._instance_lock:
-                if not cls._instance:
-                    cls._instance = super(GmailClient, cls).__new__(cls)
-        return cls._instance
+    """
+    Gmail API client, one instance per Gmail account.
+
+    Workers serve many users, so instances are cached by OAuth grant (client
+    id + refresh token) rather than shared process-wide; the least recently
+    used are dropped beyond MAX_CACHED_CLIENTS.
+    """
+
+    MAX_CACHED_CLIENTS = int(os.getenv("GMAIL_CLIENT_CACHE_SIZE", 256))
+
+    _instances = OrderedDict()
+    _instance_lock = threading.Lock()  # guards _instances
+
+    def __new__(cls, access_token, refresh_token, client_id, client_secret):
+        """Return the cached client for this account, creating it if needed."""
+        key = (client_id, refresh_token or access_token)
+        with cls._instance_lock:
+            instance = cls._instances.get(key)
+            if instance is None:
+                instance = super(GmailClient, cls).__new__(cls)
+                instance._lock = threading.Lock()  # API calls on one service
+                cls._instances[key] = instance
+                while len(cls._instances) > cls.MAX_CACHED_CLIENTS:
+                    cls._instances.popitem(last=False)
+            else:
+                cls._instances.move_to_end(key)
+        return instance
 
     def __init__(self, access_token, refresh_token, client_id, client_secret):
-        # Ensure init runs only once for the singleton
-        if hasattr(self, "_initialized") and self._initialized:
+        # Ensure init runs only once per account
+        if getattr(self, "_initialized", False):
             return
 
         creds = Credentials(
@@ -33,7 +51,7 @@ class GmailClient:
             token_uri="https://oauth2.googleapis.com/token",
         )
 
-        with GmailClient._lock:
+        with self._lock:
             if creds.expired and creds.refresh_token:
                 creds.refresh(Request())
 
@@ -44,7 +62,7 @@ class GmailClient:
 
     def mark_message_as_read(self, message_id):
         """Mark a specific Gmail message as read by removing the UNREAD label."""
-        with GmailClient._lock:
+        with self._lock:
             try:
                 self.service.users().messages().modify(
                     userId="me", id=message_id, body={"removeLabelIds": ["UNREAD"]}
@@ -56,7 +74,7 @@ class GmailClient:
 
     def get_first_email_after(self, epoch_time, query=""):
         """Get the very first email strictly after the given epoch_time."""
-        with GmailClient._lock:
+        with self._lock:
             query = f"{query} after:{epoch_time}".strip()
             response = (
                 self.service.users()
@@ -71,7 +89,7 @@ class GmailClient:
 
         emails = []
         for msg in messages:
-            with GmailClient._lock:
+            with self._lock:
                 message = (
                     self.service.users()
                     .messages()
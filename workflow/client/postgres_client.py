@@ -1,7 +1,124 @@
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import pool
+from psycopg2.extras import RealDictCursor, execute_values
+from contextlib import contextmanager
+import csv
+import io
 import os
 import threading
+import time
+
+
+def build_upsert_sql(table, columns, conflict_columns=None, pk_column="id"):
+    """
+    Build the single-row INSERT / upsert used by insert_or_update.
+
+    Returns:
+        tuple: (insert_sql, select_existing_sql, conflict_cols). select_existing_sql
+               is only set for DO NOTHING upserts, where RETURNING yields no row
+               on conflict and the existing PK has to be fetched separately.
+    """
+    columns_sql = ", ".join(columns)
+    placeholders = ", ".join(["%s"] * len(columns))
+
+    if not conflict_columns:
+        # Simple INSERT with RETURNING
+        sql = f"""
+            INSERT INTO {table} ({columns_sql})
+            VALUES ({placeholders})
+            RETURNING {pk_column};
+        """
+        return sql, None, []
+
+    # Normalize conflict columns
+    if isinstance(conflict_columns, (list, tuple)):
+        conflict_cols = list(conflict_columns)
+    else:
+        conflict_cols = [str(conflict_columns)]
+
+    update_columns = [c for c in columns if c not in conflict_cols]
+    set_clause = ", ".join([f"{c} = EXCLUDED.{c}" for c in update_columns]) or None
+    conflict_target = ", ".join(conflict_cols)
+
+    if set_clause:
+        sql = f"""
+            INSERT INTO {table} ({columns_sql})
+            VALUES ({placeholders})
+            ON CONFLICT ({conflict_target})
+            DO UPDATE SET {set_clause}
+            RETURNING {pk_column};
+        """
+        return sql, None, conflict_cols
+
+    # DO NOTHING, still return existing pk
+    # We need a separate query to fetch PK if conflict occurs
+    sql = f"""
+        INSERT INTO {table} ({columns_sql})
+        VALUES ({placeholders})
+        ON CONFLICT ({conflict_target})
+        DO NOTHING
+        RETURNING {pk_column};
+    """
+    conflict_where = " AND ".join([f"{c} = %s" for c in conflict_cols])
+    select_sql = f"SELECT {pk_column} FROM {table} WHERE {conflict_where} LIMIT 1;"
+    return sql, select_sql, conflict_cols
+
+
+class _CopyRowStream:
+    """Read-only file object that encodes rows to CSV lazily as COPY consumes it"""
+
+    # COPY ... (FORMAT csv, NULL '\N') keeps empty strings distinct from NULLs
+    NULL = "\\N"
+
+    def __init__(self, rows, columns):
+        self._rows = iter(rows)
+        self._columns = columns
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, lineterminator="\n")
+        self._pending = ""
+        self.row_count = 0
+
+    def _encode(self, row):
+        if isinstance(row, dict):
+            values = [row.get(c) for c in self._columns]
+        else:
+            values = list(row)
+        return [self.NULL if v is None else v for v in values]
+
+    def read(self, size=-1):
+        # Only buffer enough rows to satisfy this read, never the whole iterator
+        while size < 0 or len(self._pending) < size:
+            try:
+                row = next(self._rows)
+            except StopIteration:
+                break
+            self._writer.writerow(self._encode(row))
+            self.row_count += 1
+            self._pending += self._buffer.getvalue()
+            self._buffer.seek(0)
+            self._buffer.truncate()
+
+        if size < 0:
+            chunk, self._pending = self._pending, ""
+        else:
+            chunk, self._pending = self._pending[:size], self._pending[size:]
+        return chunk
+
+    readline = read
+
+
+class _StampedConnectionPool(pool.ThreadedConnectionPool):
+    """ThreadedConnectionPool that records when each connection is opened"""
+
+    def __init__(self, minconn, maxconn, *args, last_used=None, **kwargs):
+        # Shared with PostgresClient._last_used; set before the pool opens minconn
+        self.last_used = last_used if last_used is not None else {}
+        super().__init__(minconn, maxconn, *args, **kwargs)
+
+    def _connect(self, key=None):
+        conn = super()._connect(key)
+        self.last_used[id(conn)] = time.monotonic()
+        return conn
 
 
 class PostgresClient:
@@ -18,7 +135,7 @@ class PostgresClient:
         return cls._instance
 
     def __init__(self, dsn=None, **kwargs):
-        """Initialize connection only once"""
+        """Initialize connection pool only once"""
         if not self._initialized:
             with self._lock:
                 if not self._initialized:
@@ -26,7 +143,16 @@ class PostgresClient:
                     self._initialized = True
 
     def _initialize_connection(self, dsn=None, **kwargs):
-        """Initialize the database connection"""
+        """
+        Initialize the database connection pool
+
+        Pool sizing can be passed as kwargs or taken from the environment:
+            minconn (DB_POOL_MIN, default 1): connections opened up front
+            maxconn (DB_POOL_MAX, default 10): hard cap on open connections
+            pool_timeout (DB_POOL_TIMEOUT, default 30): seconds to wait for a free connection
+            idle_ping_seconds (DB_IDLE_PING_SECONDS, default 30): only connections idle
+                for longer than this are pinged with SELECT 1 before use (0 = always)
+        """
         try:
             if dsn:
                 self.dsn = dsn
@@ -40,25 +166,239 @@ class PostgresClient:
 
                 self.dsn = f"host={host} port={port} dbname={database} user={user} password={password}"
 
-            self.conn = psycopg2.connect(self.dsn)
-            self.conn.autocommit = True
-            self.cur = self.conn.cursor(cursor_factory=RealDictCursor)
+            self.minconn = int(kwargs.get("minconn", os.getenv("DB_POOL_MIN", 1)))
+            self.maxconn = int(kwargs.get("maxconn", os.getenv("DB_POOL_MAX", 10)))
+            self.pool_timeout = float(
+                kwargs.get("pool_timeout", os.getenv("DB_POOL_TIMEOUT", 30))
+            )
+            self.idle_ping_seconds = float(
+                kwargs.get("idle_ping_seconds", os.getenv("DB_IDLE_PING_SECONDS", 30))
+            )
+            self._inherited_pools = []
+            self._create_pool()
 
         except Exception as e:
             print(f"❌ Failed to connect to PostgreSQL: {e}")
             raise
 
-    def _ensure_connection(self):
-        """Ensure connection is alive, reconnect if needed"""
-        try:
-            # Test connection with a simple query
-            self.cur.execute("SELECT 1")
-        except (psycopg2.OperationalError, psycopg2.InterfaceError):
-            print("🔄 Connection lost, reconnecting...")
-            self.conn = psycopg2.connect(self.dsn)
-            self.conn.autocommit = True
-            self.cur = self.conn.cursor(cursor_factory=RealDictCursor)
+    def _create_pool(self):
+        """Create the connection pool and reset its metrics for the current process"""
+        self._pid = os.getpid()
+        # Monotonic time each pooled connection was opened or last handed back,
+        # keyed by id()
+        self._last_used = {}
+        self._pool = _StampedConnectionPool(
+            self.minconn, self.maxconn, self.dsn, last_used=self._last_used
+        )
+        # ThreadedConnectionPool raises instead of blocking when exhausted,
+        # so callers queue on this semaphore before checking a connection out
+        self._slots = threading.BoundedSemaphore(self.maxconn)
+        # table -> {column: SQL type}, for typed execute_values templates
+        self._table_column_types = {}
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "checkouts": 0,
+            "in_use": 0,
+            "timeouts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "round_trips": 0,
+            "pings": 0,
+            "reconnects": 0,
+            "retries": 0,
+        }
+
+    def _check_fork(self):
+        """Rebuild the pool in a forked child instead of sharing the parent's sockets"""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Keep a reference so the inherited connections are never
+                    # garbage collected (and terminated server-side) by the child
+                    self._inherited_pools.append(self._pool)
+                    self._create_pool()
+
+    def _count(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _execute(self, cur, sql, params=None):
+        """Execute a statement on a cursor, counting the round trip"""
+        self._count("round_trips")
+        if params:
+            cur.execute(sql, params)
+        else:
+            cur.execute(sql)
+
+    def _discard_connection(self, conn):
+        """Close a broken connection and drop it from the pool"""
+        self._last_used.pop(id(conn), None)
+        self._pool.putconn(conn, close=True)
+
+    def _ensure_connection(self, conn):
+        """
+        Ensure a pooled connection is alive, replace it if needed
+
+        Only connections that sat idle (since being opened or last used) for
+        longer than idle_ping_seconds are pinged; recent ones are trusted, and
+        a connection that dies anyway is handled by the reconnect-and-retry in
+        _run. A dead connection is discarded and its replacement checked the
+        same way: after a server restart the rest of the pool's idle
+        connections are usually dead too.
+
+        Takes ownership of conn: if it raises, every connection it checked out
+        has already been discarded.
+        """
+        reconnected = False
+        # Each dead connection is dropped from the pool, so within maxconn + 1
+        # attempts the pool has to open a new one
+        for _ in range(self.maxconn + 1):
+            last_used = self._last_used.get(id(conn))
+            if last_used is not None and time.monotonic() - last_used <= self.idle_ping_seconds:
+                # Recently opened or used connection, skip the ping
+                break
+
+            try:
+                # Test connection with a simple query
+                self._count("pings")
+                with conn.cursor() as cur:
+                    self._execute(cur, "SELECT 1")
+                break
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                print("🔄 Connection lost, reconnecting...")
+                self._discard_connection(conn)
+                self._count("reconnects")
+                reconnected = True
+                conn = self._pool.getconn()
+                conn.autocommit = True
+            except Exception:
+                self._discard_connection(conn)
+                raise
+        else:
+            self._discard_connection(conn)
+            raise psycopg2.OperationalError(
+                f"No live PostgreSQL connection after {self.maxconn + 1} attempts"
+            )
+
+        if reconnected:
             print("✅ Reconnected to PostgreSQL")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """Check out a pooled connection for the duration of a single call"""
+        self._check_fork()
+
+        wait_start = time.monotonic()
+        if not self._slots.acquire(timeout=self.pool_timeout):
+            with self._stats_lock:
+                self._stats["timeouts"] += 1
+            raise pool.PoolError(
+                f"Timed out after {self.pool_timeout}s waiting for a connection"
+            )
+        waited = time.monotonic() - wait_start
+
+        with self._stats_lock:
+            self._stats["checkouts"] += 1
+            self._stats["in_use"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["wait_seconds_max"] = max(
+                self._stats["wait_seconds_max"], waited
+            )
+
+        conn = None
+        try:
+            checked_out = self._pool.getconn()
+            checked_out.autocommit = True
+            # On failure _ensure_connection has already discarded what it held
+            conn = self._ensure_connection(checked_out)
+            yield conn
+        finally:
+            if conn is not None:
+                if conn.closed:
+                    self._discard_connection(conn)
+                else:
+                    self._last_used[id(conn)] = time.monotonic()
+                    self._pool.putconn(conn)
+            with self._stats_lock:
+                self._stats["in_use"] -= 1
+            self._slots.release()
+
+    def _run(self, operation, transaction=False, retry=True):
+        """
+        Run operation(cursor) on a pooled connection
+
+        With transaction=True every statement issued by the operation is
+        committed together (or rolled back together on error). Pass
+        retry=False for operations that cannot be replayed, e.g. ones that
+        consume an iterator or plain INSERTs, which may have been applied
+        before the connection dropped.
+
+        If the statement fails because the connection itself was dropped
+        (server restart, idle timeout, network blip), the broken connection is
+        discarded and the operation is retried once on a fresh one. Errors on a
+        still-open connection (constraint violations, statement timeouts, ...)
+        are raised as-is.
+        """
+        for attempt in range(2):
+            conn_ref = {}
+            try:
+                with self._connection() as conn, conn.cursor(
+                    cursor_factory=RealDictCursor
+                ) as cur:
+                    conn_ref["conn"] = conn
+                    if not transaction:
+                        return operation(cur)
+
+                    conn.autocommit = False
+                    try:
+                        with conn:
+                            return operation(cur)
+                    finally:
+                        if not conn.closed:
+                            conn.autocommit = True
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                conn = conn_ref.get("conn")
+                if not retry or attempt or conn is None or not conn.closed:
+                    raise
+                print("🔄 Connection lost, retrying on a new connection...")
+                self._count("retries")
+
+    def _column_types(self, cur, table):
+        """Column name -> SQL type of a table, looked up once per process"""
+        column_types = self._table_column_types.get(table)
+        if column_types is None:
+            self._execute(
+                cur,
+                """
+                SELECT attname, format_type(atttypid, atttypmod) AS column_type
+                FROM pg_attribute
+                WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped;
+                """,
+                (table,),
+            )
+            column_types = {r["attname"]: r["column_type"] for r in cur.fetchall()}
+            self._table_column_types[table] = column_types
+        return column_types
+
+    def get_pool_stats(self):
+        """
+        Return a snapshot of the connection pool metrics
+
+        Returns:
+            dict: Pool sizing, checkouts, connections in use, timeouts, wait times,
+                  and round trips / liveness pings / reconnects / retries
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+
+        checkouts = stats["checkouts"]
+        stats["wait_seconds_avg"] = (
+            stats["wait_seconds_total"] / checkouts if checkouts else 0.0
+        )
+        stats["minconn"] = self.minconn
+        stats["maxconn"] = self.maxconn
+        return stats
 
     def insert_or_update(self, table, data, conflict_columns=None, pk_column="id"):
         """
@@ -74,116 +414,281 @@ class PostgresClient:
             int: The primary key of the inserted/updated row
         """
         try:
-            self._ensure_connection()
-
             if not data:
                 raise ValueError("Data dictionary cannot be empty")
 
             columns = list(data.keys())
             values = [data[col] for col in columns]
+            sql, select_sql, conflict_cols = build_upsert_sql(
+                table, columns, conflict_columns, pk_column
+            )
+
+            def operation(cur):
+                self._execute(cur, sql, values)
+                result = cur.fetchone()
+                if result or not select_sql:
+                    return result[pk_column]
+
+                # DO NOTHING conflict happened, fetch existing row's PK
+                self._execute(cur, select_sql, [data[c] for c in conflict_cols])
+                existing = cur.fetchone()
+                return existing[pk_column] if existing else None
+
+            # An upsert is safe to replay; a plain INSERT could insert twice
+            return self._run(operation, retry=bool(conflict_cols))
+
+        except Exception as e:
+            print(f"❌ Error in insert_or_update: {e}")
+            return None
+
+    def insert_or_update_many(
+        self, table, rows, conflict_columns=None, pk_column="id", page_size=500
+    ):
+        """
+        Bulk insert or upsert rows with multi-row VALUES statements and return their primary keys.
+
+        Rows are sent page_size at a time through execute_values, all pages in
+        one transaction. When several rows share the same conflict key the last
+        one wins, exactly as calling insert_or_update on each row in order would.
+        Conflict keys are compared by Postgres on the column types (e.g. two
+        spellings of the same timestamp are one key), and primary keys are
+        matched back to rows by input position.
+
+        Args:
+            table (str): Table name
+            rows (list[dict]): Column-value mappings, all with the same columns
+            conflict_columns (str/list/tuple, optional): Column(s) to handle conflict
+            pk_column (str): Primary key column to return (default "id")
+            page_size (int): Rows per INSERT statement (default 500)
+
+        Returns:
+            list: Primary keys in the same order as rows (None entries on failure)
+        """
+        try:
+            if not rows:
+                return []
+
+            columns = list(rows[0].keys())
+            if any(set(row.keys()) != set(columns) for row in rows):
+                raise ValueError("All rows must have the same columns")
             columns_sql = ", ".join(columns)
-            placeholders = ", ".join(["%s"] * len(values))
 
             if not conflict_columns:
-                # Simple INSERT with RETURNING
-                sql = f"""
-                    INSERT INTO {table} ({columns_sql})
-                    VALUES ({placeholders})
-                    RETURNING {pk_column};
-                """
-                self.cur.execute(sql, values)
-                pk = self.cur.fetchone()[pk_column]
-                return pk
+                # Simple multi-row INSERT, RETURNING follows VALUES order
+                sql = f"INSERT INTO {table} ({columns_sql}) VALUES %s RETURNING {pk_column};"
+                values = [tuple(row[c] for c in columns) for row in rows]
+
+                def operation(cur):
+                    self._count("round_trips", -(-len(values) // page_size))
+                    result = execute_values(
+                        cur, sql, values, page_size=page_size, fetch=True
+                    )
+                    return [r[pk_column] for r in result]
+
+                # A commit lost with the connection may still have been applied
+                return self._run(operation, transaction=True, retry=False)
+
+            # Normalize conflict columns
+            if isinstance(conflict_columns, (list, tuple)):
+                conflict_cols = list(conflict_columns)
             else:
-                # Normalize conflict columns
-                if isinstance(conflict_columns, (list, tuple)):
-                    conflict_cols = list(conflict_columns)
-                else:
-                    conflict_cols = [str(conflict_columns)]
+                conflict_cols = [str(conflict_columns)]
 
-                update_columns = [c for c in columns if c not in conflict_cols]
-                set_clause = (
-                    ", ".join([f"{c} = EXCLUDED.{c}" for c in update_columns]) or None
+            update_columns = [c for c in columns if c not in conflict_cols]
+            conflict_target = ", ".join(conflict_cols)
+
+            if update_columns:
+                set_clause = ", ".join([f"{c} = EXCLUDED.{c}" for c in update_columns])
+                conflict_action = f"DO UPDATE SET {set_clause}"
+            else:
+                conflict_action = "DO NOTHING"
+
+            def matches(alias):
+                return " AND ".join(f"batch.{c} = {alias}.{c}" for c in conflict_cols)
+
+            # Rows carry their input position and are cast to the column types,
+            # so Postgres (not Python) decides which rows share a conflict key and
+            # each pk is matched back by position. DISTINCT ON keeps the last row
+            # per key, since ON CONFLICT cannot touch the same row twice in one
+            # statement; rows skipped by DO NOTHING get the existing row's pk.
+            sql = f"""
+                WITH batch (input_position, {columns_sql}) AS (VALUES %s),
+                upserted AS (
+                    INSERT INTO {table} ({columns_sql})
+                    SELECT DISTINCT ON ({conflict_target}) {columns_sql}
+                    FROM batch
+                    ORDER BY {conflict_target}, input_position DESC
+                    ON CONFLICT ({conflict_target})
+                    {conflict_action}
+                    RETURNING {", ".join([pk_column] + conflict_cols)}
                 )
-                conflict_target = ", ".join(conflict_cols)
-
-                if set_clause:
-                    sql = f"""
-                        INSERT INTO {table} ({columns_sql})
-                        VALUES ({placeholders})
-                        ON CONFLICT ({conflict_target})
-                        DO UPDATE SET {set_clause}
-                        RETURNING {pk_column};
-                    """
-                else:
-                    # DO NOTHING, still return existing pk
-                    # We need a separate query to fetch PK if conflict occurs
-                    sql = f"""
-                        INSERT INTO {table} ({columns_sql})
-                        VALUES ({placeholders})
-                        ON CONFLICT ({conflict_target})
-                        DO NOTHING
-                        RETURNING {pk_column};
-                    """
-
-                self.cur.execute(sql, values)
-                result = self.cur.fetchone()
-                if result:
-                    return result[pk_column]
-                else:
-                    # Conflict happened, fetch existing row's PK
-                    conflict_where = " AND ".join([f"{c} = %s" for c in conflict_cols])
-                    select_sql = f"SELECT {pk_column} FROM {table} WHERE {conflict_where} LIMIT 1;"
-                    self.cur.execute(select_sql, [data[c] for c in conflict_cols])
-                    existing = self.cur.fetchone()
-                    return existing[pk_column] if existing else None
+                SELECT batch.input_position, COALESCE(upserted.{pk_column}, existing.{pk_column}) AS pk
+                FROM batch
+                LEFT JOIN upserted ON {matches("upserted")}
+                LEFT JOIN {table} existing ON {matches("existing")};
+            """
+
+            def operation(cur):
+                column_types = self._column_types(cur, table)
+                template = "(%s, {})".format(
+                    ", ".join(f"%s::{column_types[c]}" for c in columns)
+                )
+                values = [
+                    (position,) + tuple(row[c] for c in columns)
+                    for position, row in enumerate(rows)
+                ]
+                self._count("round_trips", -(-len(values) // page_size))
+                result = execute_values(
+                    cur, sql, values, template=template, page_size=page_size, fetch=True
+                )
+                pks = {r["input_position"]: r["pk"] for r in result}
+                return [pks.get(position) for position in range(len(rows))]
+
+            return self._run(operation, transaction=True)
 
         except Exception as e:
-            print(f"❌ Error in insert_or_update: {e}")
-            return None
+            print(f"❌ Error in insert_or_update_many: {e}")
+            return [None] * len(rows or [])
 
-    def execute_query(self, query, params=None):
+    def copy_rows(
+        self,
+        table,
+        columns,
+        rows,
+        conflict_columns=None,
+        stage_table=None,
+        chunk_size=65536,
+        on_conflict="update",
+    ):
+        """
+        Stream rows into a table with COPY, merging through a staging table.
+
+        Rows are CSV-encoded lazily and COPYed chunk_size characters at a time
+        into a temporary staging table, which is then merged into the target
+        with a single INSERT ... SELECT ... ON CONFLICT. The iterator is consumed
+        exactly once and never held in memory; when several rows share a
+        conflict key the last one wins. Everything runs in one transaction.
+
+        Args:
+            table (str): Target table name
+            columns (list): Columns to load, in row order
+            rows (iterable): Iterator of dicts keyed by column, or tuples in column order
+            conflict_columns (str/list/tuple, optional): Column(s) to handle conflict
+            stage_table (str, optional): Name for the temporary staging table
+            chunk_size (int): Characters handed to COPY per read (default 64KiB)
+            on_conflict (str): "update" to overwrite existing rows, "ignore" to
+                keep them (DO NOTHING)
+
+        Returns:
+            dict: {"copied": rows COPYed into staging, "merged": rows inserted/updated}
+        """
+        if on_conflict not in ("update", "ignore"):
+            raise ValueError(f"on_conflict must be 'update' or 'ignore', got {on_conflict}")
+
+        columns = list(columns)
+        columns_sql = ", ".join(columns)
+        stage_table = stage_table or f"_stage_{table}"
+
+        if isinstance(conflict_columns, (list, tuple)):
+            conflict_cols = list(conflict_columns)
+        elif conflict_columns:
+            conflict_cols = [str(conflict_columns)]
+        else:
+            conflict_cols = []
+
+        # Staging table has the target's column types but none of its constraints
+        create_stage_sql = f"""
+            CREATE TEMP TABLE {stage_table} ON COMMIT DROP AS
+            SELECT {columns_sql} FROM {table} WITH NO DATA;
+            ALTER TABLE {stage_table} ADD COLUMN _copy_seq BIGINT GENERATED ALWAYS AS IDENTITY;
+        """
+        copy_sql = (
+            f"COPY {stage_table} ({columns_sql}) FROM STDIN "
+            f"WITH (FORMAT csv, NULL '{_CopyRowStream.NULL}')"
+        )
+
+        if conflict_cols:
+            conflict_target = ", ".join(conflict_cols)
+            update_columns = [c for c in columns if c not in conflict_cols]
+            if update_columns and on_conflict == "update":
+                set_clause = ", ".join([f"{c} = EXCLUDED.{c}" for c in update_columns])
+                conflict_action = f"DO UPDATE SET {set_clause}"
+            else:
+                conflict_action = "DO NOTHING"
+
+            merge_sql = f"""
+                INSERT INTO {table} ({columns_sql})
+                SELECT DISTINCT ON ({conflict_target}) {columns_sql}
+                FROM {stage_table}
+                ORDER BY {conflict_target}, _copy_seq DESC
+                ON CONFLICT ({conflict_target})
+                {conflict_action};
+            """
+        else:
+            merge_sql = f"""
+                INSERT INTO {table} ({columns_sql})
+                SELECT {columns_sql} FROM {stage_table} ORDER BY _copy_seq;
+            """
+
+        def operation(cur):
+            self._execute(cur, create_stage_sql)
+
+            stream = _CopyRowStream(rows, columns)
+            self._count("round_trips")
+            cur.copy_expert(copy_sql, stream, size=chunk_size)
+
+            self._execute(cur, merge_sql)
+            return {"copied": stream.row_count, "merged": cur.rowcount}
+
+        try:
+            return self._run(operation, transaction=True, retry=False)
+        except Exception as e:
+            print(f"❌ Error in copy_rows into {table}: {e}")
+            raise
+
+    def execute_query(self, query, params=None, raise_errors=False):
         """
         Execute a SQL query and return results
 
         Args:
             query (str): SQL query string
             params (tuple): Optional parameters for parameterized queries
+            raise_errors (bool): Re-raise failures instead of returning [], for
+                callers that must not mistake an error for "no rows"
 
         Returns:
             list: List of dictionaries for SELECT queries, empty list for others
         """
         try:
-            self._ensure_connection()
 
-            if params:
-                self.cur.execute(query, params)
-            else:
-                self.cur.execute(query)
+            def operation(cur):
+                self._execute(cur, query, params)
 
-            # Try to fetch results (for SELECT queries)
-            try:
-                result = self.cur.fetchall()
-                # Convert RealDictRow to regular dict for JSON serialization
-                return [dict(row) for row in result] if result else []
-            except psycopg2.ProgrammingError:
-                # No results to fetch (INSERT, UPDATE, DELETE, CREATE, etc.)
-                return []
+                # Try to fetch results (for SELECT queries)
+                try:
+                    result = cur.fetchall()
+                    # Convert RealDictRow to regular dict for JSON serialization
+                    return [dict(row) for row in result] if result else []
+                except psycopg2.ProgrammingError:
+                    # No results to fetch (INSERT, UPDATE, DELETE, CREATE, etc.)
+                    return []
+
+            return self._run(operation)
 
         except Exception as e:
             print(f"❌ Error executing query: {e}")
             print(f"Query: {query}")
             if params:
                 print(f"Params: {params}")
+            if raise_errors:
+                raise
             return []
 
     def close(self):
-        """Close database connection"""
+        """Close all pooled database connections"""
         try:
-            if hasattr(self, "cur") and self.cur:
-                self.cur.close()
-            if hasattr(self, "conn") and self.conn:
-                self.conn.close()
+            if hasattr(self, "_pool") and self._pool and self._pid == os.getpid():
+                self._pool.closeall()
 
             # Reset singleton state
             PostgresClient._initialized = False
@@ -197,6 +702,17 @@ class PostgresClient:
         """Get the singleton instance (alternative way to instantiate)"""
         return cls(dsn=dsn, **kwargs)
 
+    @classmethod
+    def from_env(cls):
+        """Get the singleton instance configured from the DB_* environment variables"""
+        return cls(
+            host=os.getenv("DB_HOST", "localhost"),
+            port=os.getenv("DB_PORT", 5432),
+            database=os.getenv("DB_NAME"),
+            user=os.getenv("DB_USER"),
+            password=os.getenv("DB_PASSWORD"),
+        )
+
     @classmethod
     def reset_instance(cls):
         """Reset singleton instance (useful for testing)"""
@@ -205,3 +721,12 @@ class PostgresClient:
                 cls._instance.close()
             cls._instance = None
             cls._initialized = False
+
+
+def _reset_lock_after_fork():
+    # A lock held by another thread at fork time would never be released in the child
+    PostgresClient._lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_lock_after_fork)
@@ -0,0 +1,159 @@
+import os
+import threading
+import uuid
+import redis
+
+LOCK_NAMESPACE = "mony:lock"
+METRICS_KEY = "mony:metrics:workflow"
+
+# Only the holder's token may extend or delete a lease
+_RENEW_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+_redis_client = None
+_redis_lock = threading.Lock()
+
+
+def get_redis_client():
+    """Process-wide Redis client for locks and metrics (REDIS_URL)"""
+    global _redis_client
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                _redis_client = redis.Redis.from_url(
+                    os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+                    decode_responses=True,
+                    socket_timeout=5,
+                    socket_connect_timeout=5,
+                )
+    return _redis_client
+
+
+def user_lock_key(user_id, name="workflow"):
+    return f"{LOCK_NAMESPACE}:{name}:{int(user_id)}"
+
+
+def acquire_lease(key, ttl_seconds):
+    """
+    Try to take a lease (SET NX PX)
+
+    Returns:
+        str: The lease token, or None when someone else holds it
+    """
+    token = uuid.uuid4().hex
+    acquired = get_redis_client().set(key, token, nx=True, px=int(ttl_seconds * 1000))
+    return token if acquired else None
+
+
+def renew_lease(key, token, ttl_seconds):
+    """Extend a lease we still hold; False if it expired or changed hands"""
+    renewed = get_redis_client().eval(
+        _RENEW_SCRIPT, 1, key, token, int(ttl_seconds * 1000)
+    )
+    return bool(renewed)
+
+
+def release_lease(key, token):
+    """Delete a lease only if we still hold it"""
+    return bool(get_redis_client().eval(_RELEASE_SCRIPT, 1, key, token))
+
+
+def record_workflow_metric(name, user_id=None, amount=1):
+    """
+    Count a workflow event in Redis: a global counter in the METRICS_KEY hash
+    and, with user_id, a per-user counter in METRICS_KEY:<name>
+    """
+    try:
+        pipe = get_redis_client().pipeline()
+        pipe.hincrby(METRICS_KEY, name, amount)
+        if user_id is not None:
+            pipe.hincrby(f"{METRICS_KEY}:{name}", str(user_id), amount)
+        pipe.execute()
+    except Exception as e:
+        print(f"❌ Failed to record workflow metric {name}: {e}")
+
+
+def get_workflow_metrics(name=None):
+    """Global workflow counters, or the per-user counters of one metric"""
+    key = f"{METRICS_KEY}:{name}" if name else METRICS_KEY
+    return {field: int(value) for field, value in get_redis_client().hgetall(key).items()}
+
+
+class LeaseLock:
+    """
+    Redis lease lock with a heartbeat.
+
+    The lease expires after ttl_seconds unless renewed, so a crashed holder
+    can't block the key forever; while held, a daemon thread renews it every
+    ttl_seconds / 3. If a renewal finds the lease gone (e.g. Redis evicted it
+    or the holder stalled past the TTL) `lost` is set.
+
+        with LeaseLock(user_lock_key(11), ttl_seconds=120) as lock:
+            if lock.acquired:
+                ...
+    """
+
+    def __init__(self, key, ttl_seconds=120, heartbeat_seconds=None):
+        self.key = key
+        self.ttl_seconds = ttl_seconds
+        self.heartbeat_seconds = heartbeat_seconds or ttl_seconds / 3
+        self.token = None
+        self.lost = False
+        self._stop = threading.Event()
+        self._heartbeat = None
+
+    @property
+    def acquired(self):
+        return self.token is not None
+
+    def acquire(self):
+        """Take the lease and start the heartbeat; returns whether we got it"""
+        self.token = acquire_lease(self.key, self.ttl_seconds)
+        if self.token:
+            self._stop.clear()
+            self._heartbeat = threading.Thread(
+                target=self._renew_until_stopped, name=f"lease-{self.key}", daemon=True
+            )
+            self._heartbeat.start()
+        return self.acquired
+
+    def _renew_until_stopped(self):
+        while not self._stop.wait(self.heartbeat_seconds):
+            try:
+                if not renew_lease(self.key, self.token, self.ttl_seconds):
+                    print(f"⚠️  Lease {self.key} lost before release")
+                    self.lost = True
+                    return
+            except Exception as e:
+                # Transient Redis error: keep trying until the TTL runs out
+                print(f"❌ Failed to renew lease {self.key}: {e}")
+
+    def release(self):
+        """Stop the heartbeat and delete the lease if we still hold it"""
+        if not self.token:
+            return
+        self._stop.set()
+        if self._heartbeat:
+            self._heartbeat.join()
+        try:
+            release_lease(self.key, self.token)
+        except Exception as e:
+            print(f"❌ Failed to release lease {self.key}: {e}")
+        self.token = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -88,6 +88,65 @@ class TelegramClient:
     def remove_reply_keyboard(self):
         return {"remove_keyboard": True}
 
+    def send_selection_prompt(
+        self, chat_id, message, predefined_options, parse_mode=None, buttons_per_row=2
+    ):
+        """Send a message with option buttons plus a custom-answer button"""
+        keyboard = self.create_reply_keyboard_with_custom(
+            predefined_options, buttons_per_row
+        )
+        prompt_text = f"{message}\n\nChoose from buttons below OR type your own answer:"
+        return self.send_message(
+            chat_id, prompt_text, parse_mode=parse_mode, reply_markup=keyboard
+        )
+
+    def handle_selection_reply(
+        self, chat_id, user_text, predefined_options, custom_input_mode=False
+    ):
+        """
+        Act on one text reply to a selection prompt
+        Returns: (result or None, custom_input_mode) where result is
+                 {"type": "predefined"|"custom", "value": selected_text}
+        """
+        user_text = user_text.strip()
+        print(f"Received: '{user_text}'")
+
+        # Check if user selected "Type my own answer"
+        if user_text == "✏️ Type my own answer":
+            self.send_message(
+                chat_id,
+                "✏️ Please type your custom answer:",
+                reply_markup=self.remove_reply_keyboard(),
+            )
+            return None, True
+
+        # If in custom input mode, accept any text
+        if custom_input_mode:
+            self.send_message(chat_id, f"✅ Got your custom answer: {user_text}")
+            return {"type": "custom", "value": user_text}, True
+
+        # Check if text matches predefined options (button selection)
+        if user_text in predefined_options:
+            self.send_message(
+                chat_id,
+                f"✅ You selected: {user_text}",
+                reply_markup=self.remove_reply_keyboard(),
+            )
+            return {"type": "predefined", "value": user_text}, False
+
+        # User typed something directly (not a button, treat as custom)
+        self.send_message(
+            chat_id,
+            f"✅ Got your custom input: {user_text}",
+            reply_markup=self.remove_reply_keyboard(),
+        )
+        return {"type": "custom", "value": user_text}, False
+
+    def send_selection_timeout(self, chat_id):
+        self.send_message(
+            chat_id, "⏰ Selection timeout.", reply_markup=self.remove_reply_keyboard()
+        )
+
     def wait_for_selection_or_custom_input(
         self,
         chat_id,
@@ -100,15 +159,13 @@ class TelegramClient:
         """
         Handle both reply button selections AND custom text input
         Returns: {"type": "predefined"|"custom", "value": selected_text}
-        """
-        # Create keyboard with predefined options + custom option
-        keyboard = self.create_reply_keyboard_with_custom(
-            predefined_options, buttons_per_row
-        )
 
-        prompt_text = f"{message}\n\nChoose from buttons below OR type your own answer:"
-        sent = self.send_message(
-            chat_id, prompt_text, parse_mode=parse_mode, reply_markup=keyboard
+        Polls the bot-wide getUpdates itself, so only one caller per bot token
+        may use it at a time; concurrent workers go through
+        workflow/telegram_router.py instead.
+        """
+        sent = self.send_selection_prompt(
+            chat_id, message, predefined_options, parse_mode, buttons_per_row
         )
         if not sent:
             return None
@@ -152,52 +209,18 @@ class TelegramClient:
                     if "text" not in msg:
                         continue
 
-                    user_text = msg["text"].strip()
-                    print(f"Received: '{user_text}'")
-
-                    # Check if user selected "Type my own answer"
-                    if user_text == "✏️ Type my own answer":
-                        custom_input_mode = True
-                        self.send_message(
-                            chat_id,
-                            "✏️ Please type your custom answer:",
-                            reply_markup=self.remove_reply_keyboard(),
-                        )
-                        continue
-
-                    # If in custom input mode, accept any text
-                    if custom_input_mode:
-                        self.send_message(
-                            chat_id, f"✅ Got your custom answer: {user_text}"
-                        )
-                        return {"type": "custom", "value": user_text}
-
-                    # Check if text matches predefined options (button selection)
-                    elif user_text in predefined_options:
-                        self.send_message(
-                            chat_id,
-                            f"✅ You selected: {user_text}",
-                            reply_markup=self.remove_reply_keyboard(),
-                        )
-                        return {"type": "predefined", "value": user_text}
-
-                    # User typed something directly (not a button, treat as custom)
-                    else:
-                        self.send_message(
-                            chat_id,
-                            f"✅ Got your custom input: {user_text}",
-                            reply_markup=self.remove_reply_keyboard(),
-                        )
-                        return {"type": "custom", "value": user_text}
+                    result, custom_input_mode = self.handle_selection_reply(
+                        chat_id, msg["text"], predefined_options, custom_input_mode
+                    )
+                    if result:
+                        return result
 
             except Exception as e:
                 print(f"Error in polling loop: {e}")
                 time.sleep(1)
 
         # Timeout
-        self.send_message(
-            chat_id, "⏰ Selection timeout.", reply_markup=self.remove_reply_keyboard()
-        )
+        self.send_selection_timeout(chat_id)
         return None
 
     def wait_for_user_input(self, chat_id, timeout_minutes=5, prompt_message=None):
@@ -4,15 +4,37 @@ from workflow.client.gmail_client import GmailClient
 from workflow.client.openai_client import OpenAIClient
 from workflow.client.telegram_client import TelegramClient
 from workflow.client.postgres_client import PostgresClient
+from workflow.client.cache_client import CacheClient, reference_key
 from datetime import datetime, timedelta
+from decimal import Decimal
 from dateutil import parser
+import pytz
 from dotenv import load_dotenv
 from workflow.client.logging_client import MonyLogger
+from workflow.telegram_router import wait_for_selection
+from workflow.user_context import user_context_cache
 
 load_dotenv()
 
+USER_TRANSACTION_COLUMNS = [
+    "user_id",
+    "transaction_type",
+    "amount",
+    "counterparty",
+    "transaction_id",
+    "transaction_date",
+    "transaction_time",
+    "transaction_at",
+    "transaction_category",
+]
 
-def read_gmail(epoch_time, query):
+# workflow_run is partitioned by email_datetime, so it is part of the upsert key
+WORKFLOW_RUN_CONFLICT_COLUMNS = ["user_id", "email_message_id", "email_datetime"]
+
+IST_TIMEZONE = pytz.timezone("Asia/Kolkata")
+
+
+def read_gmail(user_id, epoch_time, query):
     google_tokens = get_user_google_tokens(user_id=user_id)
     gmail = GmailClient(
         access_token=google_tokens.get("access_token"),
@@ -35,43 +57,15 @@ def read_gmail(epoch_time, query):
 
 
 def get_user_google_tokens(user_id: int):
-    pg_client = PostgresClient(
-        host=os.getenv("DB_HOST", "localhost"),
-        port=os.getenv("DB_PORT", 5432),
-        database=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-    )
-
-    query = """
-            SELECT access_token, refresh_token
-            FROM gmail_credentials
-            WHERE user_id = %s;
-        """
-
-    result = pg_client.execute_query(query, (user_id,))
-    return result[0]
+    # Served from the per-run user context (loaded in one query)
+    google_tokens = user_context_cache.get(user_id)["google_tokens"]
+    if not google_tokens:
+        raise ValueError(f"No Gmail credentials found for user {user_id}")
+    return google_tokens
 
 
 def get_user_last_email_epoch(user_id):
-    pg_client = PostgresClient(
-        host=os.getenv("DB_HOST", "localhost"),
-        port=os.getenv("DB_PORT", 5432),
-        database=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-    )
-
-    query = """
-        SELECT MAX(email_datetime) as last_run
-        FROM workflow_run
-        WHERE user_id = %s;
-    """
-
-    result = pg_client.execute_query(query, (user_id,))
-    last_run_datetime = (
-        result[0]["last_run"] if result and result[0]["last_run"] else None
-    )
+    last_run_datetime = user_context_cache.get(user_id)["last_email_datetime"]
 
     if last_run_datetime:
         # Convert datetime to epoch (int)
@@ -166,59 +160,39 @@ def chat_summarizer(transaction_detail):
 
 
 def get_user_transaction_categories(user_id):
-    pg_client = PostgresClient(
-        host=os.getenv("DB_HOST", "localhost"),
-        port=os.getenv("DB_PORT", 5432),
-        database=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-    )
-
-    query = """
-        SELECT distinct category
-        FROM transaction_category
-        WHERE user_id = %s
-          AND is_active = %s;
-    """
-    result = pg_client.execute_query(
-        query,
-        (
-            user_id,
-            True,
-        ),
+    # Each run's fetch reloads the user's context (watermark and tokens must be
+    # current) and seeds the shared reference cache, so a categorize worker in
+    # another process reads it from there instead of reloading the context.
+    # A miss reloads from the database; a cached context may predate the last
+    # invalidation
+    return CacheClient().get_or_load(
+        reference_key(user_id, "categories"),
+        lambda: user_context_cache.get(user_id, refresh=True)["transaction_categories"],
     )
 
-    return [row["category"] for row in result]
-
 
 def get_user_telegram_info(user_id):
-    pg_client = PostgresClient(
-        host=os.getenv("DB_HOST", "localhost"),
-        port=os.getenv("DB_PORT", 5432),
-        database=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-    )
-
-    query = """
-        SELECT telegram_chat_id
-        FROM user_telegram
-        WHERE user_id = %s;
-    """
-    result = pg_client.execute_query(
-        query,
-        (user_id,),
+    return CacheClient().get_or_load(
+        reference_key(user_id, "telegram_chat_id"),
+        lambda: user_context_cache.get(user_id, refresh=True)["telegram_chat_id"],
     )
 
-    if len(result) > 0:
-        return result[0]["telegram_chat_id"]
-    else:
-        return None
-
 
 def send_telegram_message(transaction_message, transaction_categories, chat_id):
-    telegram = TelegramClient(os.getenv("TELEGRAM_BOT_TOKEN"))
+    # Workers wait on replies routed by the single update consumer
+    # (workflow/telegram_router.py); polling getUpdates directly is only safe
+    # for one process at a time, e.g. a one-off local run
+    if os.getenv("TELEGRAM_REPLY_ROUTER", "true").lower() in ("1", "true", "yes"):
+        return wait_for_selection(
+            chat_id=chat_id,
+            message=transaction_message,
+            predefined_options=transaction_categories,
+            parse_mode="Markdown",
+            timeout_minutes=1,
+            buttons_per_row=3,
+        )
 
+    telegram = TelegramClient(os.getenv("TELEGRAM_BOT_TOKEN"))
     result = telegram.wait_for_selection_or_custom_input(
         chat_id=chat_id,
         message=transaction_message,
@@ -231,72 +205,178 @@ def send_telegram_message(transaction_message, transaction_categories, chat_id):
     return result
 
 
-def insert_user_transaction_to_db(data):
-    pg_client = PostgresClient(
-        host=os.getenv("DB_HOST", "localhost"),
-        port=os.getenv("DB_PORT", 5432),
-        database=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-    )
+def normalize_user_transaction(data):
+    """
+    Add the typed columns to a user transaction dict: an exact NUMERIC amount
+    and transaction_at, the IST transaction_date/transaction_time as a
+    timezone-aware datetime (falls back to now when they can't be parsed).
+    """
+    normalized = dict(data)
+    normalized["amount"] = Decimal(
+        str(data["amount"]).replace(",", "").strip()
+    ).quantize(Decimal("0.01"))
 
     try:
-        pk = pg_client.insert_or_update(
-            table="user_transactions",
-            data=data,
-            conflict_columns=["user_id", "transaction_id"],
-            pk_column="id",
+        naive_dt = parser.parse(
+            f"{data['transaction_date']} {data.get('transaction_time') or ''}".strip()
+        )
+        transaction_at = (
+            naive_dt if naive_dt.tzinfo else IST_TIMEZONE.localize(naive_dt)
         )
+    except (ValueError, OverflowError):
+        transaction_at = datetime.now(IST_TIMEZONE)
 
-        if not pk:
-            raise ValueError("Failed to insert or update user transaction")
+    normalized["transaction_at"] = transaction_at
+    return normalized
 
-        return pk
 
-    finally:
-        pg_client.close()
+def insert_user_transaction_to_db(data):
+    pg_client = PostgresClient.from_env()
 
+    pk = pg_client.insert_or_update(
+        table="user_transactions",
+        data=normalize_user_transaction(data),
+        conflict_columns=["user_id", "transaction_id"],
+        pk_column="id",
+    )
 
-def log_user_workflow_run(data):
-    pg_client = PostgresClient(
-        host=os.getenv("DB_HOST", "localhost"),
-        port=os.getenv("DB_PORT", 5432),
-        database=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
+    if not pk:
+        raise ValueError("Failed to insert or update user transaction")
+
+    return pk
+
+
+def insert_user_transactions_to_db(rows):
+    """Bulk upsert user transactions (backfills, batched runs), PKs in input order"""
+    pg_client = PostgresClient.from_env()
+
+    pks = pg_client.insert_or_update_many(
+        table="user_transactions",
+        rows=[normalize_user_transaction(row) for row in rows],
+        conflict_columns=["user_id", "transaction_id"],
+        pk_column="id",
+    )
+
+    if rows and not any(pks):
+        raise ValueError("Failed to insert or update user transactions")
+
+    return pks
+
+
+def bulk_load_user_transactions(rows):
+    """
+    Stream a large iterator of user transaction dicts (historical imports,
+    migrations) into user_transactions via COPY, upserting on
+    (user_id, transaction_id). Returns {"copied": n, "merged": n}.
+    """
+    pg_client = PostgresClient.from_env()
+
+    return pg_client.copy_rows(
+        table="user_transactions",
+        columns=USER_TRANSACTION_COLUMNS,
+        rows=(normalize_user_transaction(row) for row in rows),
+        conflict_columns=["user_id", "transaction_id"],
     )
 
+
+def build_user_transaction(user_id, transaction_info, transaction_category):
+    """user_transactions row for a finance email's extracted transaction"""
+    return {
+        "user_id": user_id,
+        "transaction_type": transaction_info["transaction_type"],
+        "amount": transaction_info["amount"],
+        "counterparty": transaction_info["counterparty"],
+        "transaction_id": transaction_info["transaction_id"],
+        "transaction_date": transaction_info["transaction_date"],
+        "transaction_time": transaction_info["transaction_time"],
+        "transaction_category": transaction_category,
+    }
+
+
+def build_workflow_run(
+    user_id,
+    email_data,
+    transaction_info,
+    run_start_time,
+    run_end_time,
+    run_status,
+    error_message,
+):
+    """
+    workflow_run row for one processed email
+
+    email_datetime is always Gmail's receive time: it is part of the upsert
+    key, so any other value (the LLM's copy, the run start) would log a retry
+    of the same email as a second row.
+    """
+    email_datetime = email_data.get("email_received_datetime")
+    if not email_datetime:
+        raise ValueError(
+            f"Email {email_data.get('message_id')} has no Gmail receive time"
+        )
+
+    return {
+        "user_id": user_id,
+        "user_transaction_id": transaction_info.get("transaction_pk"),
+        "run_start_datetime": run_start_time,
+        "run_end_datetime": run_end_time,
+        "email_message_id": email_data.get("message_id", ""),
+        "email_subject": email_data.get("subject", ""),
+        # Gmail's timezone-aware receive time; advances the user's watermark
+        "email_datetime": email_datetime,
+        "is_finance_email": transaction_info.get("is_finance_email", False),
+        "run_status": run_status,
+        "error_message": error_message,
+    }
+
+
+def log_user_workflow_run(data):
+    pg_client = PostgresClient.from_env()
+
     # Add/overwrite updated_at before insert
     data["updated_at"] = datetime.now()
 
     pg_client.insert_or_update(
         table="workflow_run",
         data=data,
-        conflict_columns=["user_id", "email_message_id"],
+        conflict_columns=WORKFLOW_RUN_CONFLICT_COLUMNS,
         pk_column="run_id",
     )
 
-    pg_client.close()
 
+def log_user_workflow_runs(rows):
+    """Bulk log workflow runs (backfills, batched runs), run ids in input order"""
+    pg_client = PostgresClient.from_env()
+
+    # Add/overwrite updated_at before insert
+    updated_at = datetime.now()
+    rows = [{**row, "updated_at": updated_at} for row in rows]
 
-def is_message_already_processed(user_id, message_id):
-    pg_client = PostgresClient(
-        host=os.getenv("DB_HOST", "localhost"),
-        port=os.getenv("DB_PORT", 5432),
-        database=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
+    return pg_client.insert_or_update_many(
+        table="workflow_run",
+        rows=rows,
+        conflict_columns=WORKFLOW_RUN_CONFLICT_COLUMNS,
+        pk_column="run_id",
     )
 
+
+def is_message_already_processed(user_id, message_id, email_datetime=None):
+    pg_client = PostgresClient.from_env()
+
     query = """
         SELECT 1 
         FROM workflow_run
         WHERE user_id = %s
           AND email_message_id = %s
           AND run_status = 'success'
-        LIMIT 1;
     """
-    result = pg_client.execute_query(query, (user_id, message_id))
+    params = [user_id, message_id]
+    if email_datetime:
+        # Lets Postgres prune the lookup to a single monthly partition
+        query += " AND email_datetime = %s"
+        params.append(email_datetime)
+
+    result = pg_client.execute_query(query + " LIMIT 1;", tuple(params))
     return len(result) > 0
 
 
@@ -376,19 +456,29 @@ def run_workflow(user_id, logger):
     try:
         logger.info("Starting workflow run")
 
+        # Load tokens, last email, categories and telegram in one query;
+        # the helpers below read from this per-run cache
+        user_context_cache.get(user_id, refresh=True)
+
         # Step 1: Fetch Gmail
         user_last_read_epoch = get_user_last_email_epoch(user_id=user_id)
         logger.info(f"Last read Gmail epoch: {user_last_read_epoch}")
 
         email_data = read_gmail(
-            epoch_time=user_last_read_epoch, query="in:inbox category:primary"
+            user_id=user_id,
+            epoch_time=user_last_read_epoch,
+            query="in:inbox category:primary",
         )
         if not email_data:
             logger.info("No unread emails found")
             return "success", "", run_start_time, datetime.now(), {}, {}
 
         # Step 2: Duplicate check
-        if is_message_already_processed(user_id, email_data["message_id"]):
+        if is_message_already_processed(
+            user_id,
+            email_data["message_id"],
+            email_datetime=email_data.get("email_received_datetime"),
+        ):
             logger.info(
                 f"Email {email_data['message_id']} already processed, skipping."
             )
@@ -414,16 +504,9 @@ def run_workflow(user_id, logger):
         logger.info(f"Transaction categorized as: {transaction_category}")
 
         # Step 5: DB insert
-        user_transaction = {
-            "user_id": user_id,
-            "transaction_type": transaction_info["transaction_type"],
-            "amount": transaction_info["amount"],
-            "counterparty": transaction_info["counterparty"],
-            "transaction_id": transaction_info["transaction_id"],
-            "transaction_date": transaction_info["transaction_date"],
-            "transaction_time": transaction_info["transaction_time"],
-            "transaction_category": transaction_category,
-        }
+        user_transaction = build_user_transaction(
+            user_id, transaction_info, transaction_category
+        )
         transaction_pk = insert_user_transaction_to_db(user_transaction)
         logger.info(f"Transaction saved with PK={transaction_pk}")
 
@@ -471,18 +554,15 @@ def run_user_workflow(user_id: int):
     # Only log if transaction_info is not empty
     if transaction_info:
         log_user_workflow_run(
-            data={
-                "user_id": user_id,
-                "user_transaction_id": transaction_info.get("transaction_pk"),
-                "run_start_datetime": run_start_time,
-                "run_end_datetime": run_end_time,
-                "email_message_id": email_data.get("message_id", ""),
-                "email_subject": email_data.get("subject", ""),
-                "email_datetime": transaction_info.get("email_received_datetime"),
-                "is_finance_email": transaction_info.get("is_finance_email", False),
-                "run_status": run_status,
-                "error_message": error_message,
-            }
+            data=build_workflow_run(
+                user_id,
+                email_data,
+                transaction_info,
+                run_start_time,
+                run_end_time,
+                run_status,
+                error_message,
+            )
         )
         logger.info(
             f"Email message id: {email_data.get('message_id')} logged to workflow run"
@@ -0,0 +1,276 @@
+"""
+Weighted fair queue for workflow jobs, across users.
+
+Jobs wait in Redis, one FIFO per user per lane, instead of going straight to
+the broker, where a single user's backlog would sit in front of everyone
+else's. The dispatcher (workflow.tasks.dispatch_workflow_jobs) releases them a
+few at a time in fair order:
+
+  - lanes: every eligible "live" job goes before any "backfill" job
+  - within a lane: start-time fair queuing on user_id; each user's next job is
+    tagged max(lane virtual time, user's last tag) + 1 / weight and the lowest
+    tag goes first, so a user with 5,000 queued jobs gets one turn per round,
+    like everyone else (weight 2 gets two)
+  - per-user cap: at most max_inflight dispatched, unfinished jobs per user
+    (WORKFLOW_USER_MAX_INFLIGHT, overridable per user with set_user_quota)
+
+A job's task gets job_id and lane kwargs and must call complete_job when it
+finishes; a slot that is never completed frees itself after
+FAIR_QUEUE_JOB_TIMEOUT_SECONDS. A user leaves the :users set once they have
+nothing queued or in flight.
+
+Usage:
+    python -m workflow.fair_queue            # per-user queue depths
+"""
+
+import json
+import os
+import time
+from workflow.client.redis_lock import get_redis_client
+
+FAIR_QUEUE_PREFIX = "mony:fq"
+LANES = ("live", "backfill")
+
+USER_MAX_INFLIGHT = int(os.getenv("WORKFLOW_USER_MAX_INFLIGHT", 1))
+JOB_TIMEOUT_SECONDS = int(os.getenv("FAIR_QUEUE_JOB_TIMEOUT_SECONDS", 900))
+
+# ARGV: prefix, lane, user_id, job, unique
+_SUBMIT_SCRIPT = """
+local prefix, lane, user, job, unique = ARGV[1], ARGV[2], ARGV[3], ARGV[4], ARGV[5]
+local lane_key = prefix .. ":" .. lane
+local queue = lane_key .. ":q:" .. user
+if unique == "1" and redis.call("LLEN", queue) > 0 then
+    return 0
+end
+
+redis.call("RPUSH", queue, job)
+redis.call("HINCRBY", lane_key .. ":depth", user, 1)
+redis.call("SADD", prefix .. ":users", user)
+
+if not redis.call("ZSCORE", lane_key .. ":active", user) then
+    local weight = tonumber(redis.call("HGET", prefix .. ":weights", user) or "1")
+    local vtime = tonumber(redis.call("GET", lane_key .. ":vtime") or "0")
+    local last_tag = tonumber(redis.call("HGET", lane_key .. ":tag", user) or "0")
+    redis.call("ZADD", lane_key .. ":active", math.max(vtime, last_tag) + 1 / weight, user)
+end
+return 1
+"""
+
+# ARGV: prefix, now_ms, limit, default_cap, timeout_ms, lane...
+# Returns [[user_id, lane, job, job_id], ...] in dispatch order
+_DISPATCH_SCRIPT = """
+local prefix = ARGV[1]
+local now = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+local default_cap = tonumber(ARGV[4])
+local timeout_ms = tonumber(ARGV[5])
+local dispatched = {}
+
+for i = 6, #ARGV do
+    local lane = ARGV[i]
+    local lane_key = prefix .. ":" .. lane
+    local active = lane_key .. ":active"
+
+    -- Repeatedly take the lowest-tagged user that is under their cap
+    local progress = true
+    while #dispatched < limit and progress do
+        progress = false
+        local users = redis.call("ZRANGE", active, 0, -1, "WITHSCORES")
+        for j = 1, #users, 2 do
+            local user, tag = users[j], tonumber(users[j + 1])
+            local queue = lane_key .. ":q:" .. user
+            local inflight = prefix .. ":inflight:" .. user
+            redis.call("ZREMRANGEBYSCORE", inflight, "-inf", now)
+            local cap = tonumber(redis.call("HGET", prefix .. ":caps", user) or default_cap)
+
+            if redis.call("ZCARD", inflight) < cap then
+                local job = redis.call("LPOP", queue)
+                if job then
+                    local job_id = tostring(redis.call("INCR", prefix .. ":job_seq"))
+                    redis.call("ZADD", inflight, now + timeout_ms, job_id)
+                    redis.call("HINCRBY", lane_key .. ":depth", user, -1)
+                    redis.call("SET", lane_key .. ":vtime", tag)
+                    redis.call("HSET", lane_key .. ":tag", user, tag)
+                    table.insert(dispatched, {user, lane, job, job_id})
+                    progress = true
+                end
+
+                if redis.call("LLEN", queue) > 0 then
+                    local weight = tonumber(redis.call("HGET", prefix .. ":weights", user) or "1")
+                    redis.call("ZADD", active, tag + 1 / weight, user)
+                else
+                    redis.call("ZREM", active, user)
+                    redis.call("HDEL", lane_key .. ":depth", user)
+                end
+
+                if progress then
+                    break
+                end
+            end
+        end
+    end
+end
+return dispatched
+"""
+
+# ARGV: prefix, user_id, job_id, now_ms, lane...
+# Frees the slot, then forgets the user if nothing is queued or in flight
+_COMPLETE_SCRIPT = """
+local prefix, user = ARGV[1], ARGV[2]
+local inflight = prefix .. ":inflight:" .. user
+redis.call("ZREM", inflight, ARGV[3])
+redis.call("ZREMRANGEBYSCORE", inflight, "-inf", tonumber(ARGV[4]))
+if redis.call("ZCARD", inflight) > 0 then
+    return 0
+end
+for i = 5, #ARGV do
+    if redis.call("LLEN", prefix .. ":" .. ARGV[i] .. ":q:" .. user) > 0 then
+        return 0
+    end
+end
+redis.call("SREM", prefix .. ":users", user)
+return 1
+"""
+
+
+def submit_job(user_id, task_name, args=None, lane="live", unique=False):
+    """
+    Queue a job for a user
+
+    Args:
+        user_id (int): Owner of the job
+        task_name (str): Celery task to run; it receives job_id and lane kwargs
+        args (list, optional): Positional task arguments
+        lane (str): "live" or "backfill"
+        unique (bool): Skip if the user already has a job waiting in this lane
+
+    Returns:
+        bool: Whether the job was queued
+    """
+    if lane not in LANES:
+        raise ValueError(f"Unknown lane: {lane}")
+
+    job = json.dumps({"task": task_name, "args": list(args or [])})
+    queued = get_redis_client().eval(
+        _SUBMIT_SCRIPT,
+        0,
+        FAIR_QUEUE_PREFIX,
+        lane,
+        int(user_id),
+        job,
+        "1" if unique else "0",
+    )
+    return bool(queued)
+
+
+def dispatch_jobs(limit):
+    """
+    Take up to limit jobs off the queues in fair order, marking each in flight
+
+    Returns:
+        list: [{"user_id", "lane", "task", "args", "job_id"}]
+    """
+    if limit <= 0:
+        return []
+
+    rows = get_redis_client().eval(
+        _DISPATCH_SCRIPT,
+        0,
+        FAIR_QUEUE_PREFIX,
+        int(time.time() * 1000),
+        limit,
+        USER_MAX_INFLIGHT,
+        JOB_TIMEOUT_SECONDS * 1000,
+        *LANES,
+    )
+
+    jobs = []
+    for user_id, lane, job, job_id in rows:
+        job = json.loads(job)
+        jobs.append(
+            {
+                "user_id": int(user_id),
+                "lane": lane,
+                "task": job["task"],
+                "args": job["args"],
+                "job_id": job_id,
+            }
+        )
+    return jobs
+
+
+def complete_job(user_id, job_id):
+    """Free the user's in-flight slot held by a dispatched job"""
+    if job_id is None:
+        return
+    try:
+        get_redis_client().eval(
+            _COMPLETE_SCRIPT,
+            0,
+            FAIR_QUEUE_PREFIX,
+            int(user_id),
+            job_id,
+            int(time.time() * 1000),
+            *LANES,
+        )
+    except Exception as e:
+        print(f"❌ Failed to complete job {job_id} for user {user_id}: {e}")
+
+
+def set_user_quota(user_id, weight=None, max_inflight=None):
+    """
+    Override a user's share and concurrency cap (None leaves a value unchanged)
+
+    Args:
+        user_id (int): Tenant to configure
+        weight (float, optional): Relative share of dispatch turns (default 1)
+        max_inflight (int, optional): Concurrent jobs (default WORKFLOW_USER_MAX_INFLIGHT)
+    """
+    client = get_redis_client()
+    if weight is not None:
+        if weight <= 0:
+            raise ValueError("weight must be positive")
+        client.hset(f"{FAIR_QUEUE_PREFIX}:weights", int(user_id), weight)
+    if max_inflight is not None:
+        client.hset(f"{FAIR_QUEUE_PREFIX}:caps", int(user_id), int(max_inflight))
+
+
+def get_queue_depths():
+    """
+    Per-user queue depth: jobs waiting in each lane and jobs in flight
+
+    Returns:
+        dict: user_id -> {"live", "backfill", "inflight"}, users with any work only
+    """
+    client = get_redis_client()
+    user_ids = sorted(int(user_id) for user_id in client.smembers(f"{FAIR_QUEUE_PREFIX}:users"))
+    if not user_ids:
+        return {}
+
+    now_ms = int(time.time() * 1000)
+    pipe = client.pipeline()
+    for lane in LANES:
+        pipe.hgetall(f"{FAIR_QUEUE_PREFIX}:{lane}:depth")
+    for user_id in user_ids:
+        pipe.zcount(f"{FAIR_QUEUE_PREFIX}:inflight:{user_id}", now_ms, "+inf")
+    results = pipe.execute()
+
+    lane_depths = dict(zip(LANES, results[: len(LANES)]))
+    depths = {}
+    for user_id, inflight in zip(user_ids, results[len(LANES):]):
+        depth = {lane: int(lane_depths[lane].get(str(user_id), 0)) for lane in LANES}
+        depth["inflight"] = inflight
+        if any(depth.values()):
+            depths[user_id] = depth
+    return depths
+
+
+if __name__ == "__main__":
+    depths = get_queue_depths()
+    if not depths:
+        print("✅ No queued or in-flight workflow jobs")
+    for user_id, depth in depths.items():
+        print(
+            f"user {user_id}: live={depth['live']} backfill={depth['backfill']} "
+            f"inflight={depth['inflight']}"
+        )
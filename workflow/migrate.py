@@ -0,0 +1,356 @@
+"""
+Versioned schema migrations.
+
+Applies db_ddl.sql (as version 0000) and then every migrations/NNNN_name.sql
+that has not been recorded in schema_migrations yet, in version order. Each
+file runs in its own transaction unless its first line is
+`-- migrate:no-transaction` (needed for CREATE INDEX CONCURRENTLY); such files
+are split on `;` and must not contain function bodies. Every migration is
+written to be idempotent, so re-running a partially applied one is safe.
+
+Usage:
+    python -m workflow.migrate                  # apply pending migrations
+    python -m workflow.migrate --status         # list applied / pending
+    python -m workflow.migrate --check-indexes  # assert hot queries use their indexes
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+import psycopg2
+from dotenv import load_dotenv
+from workflow.user_context import USER_CONTEXT_QUERY
+
+load_dotenv()
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BASE_SCHEMA = ROOT_DIR / "db_ddl.sql"
+MIGRATIONS_DIR = ROOT_DIR / "migrations"
+NO_TRANSACTION_MARKER = "-- migrate:no-transaction"
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+# (description, query, params, indexes the plan must use)
+INDEX_CHECKS = [
+    (
+        "UserDB.get_user_gmail",
+        "SELECT gmail_email FROM gmail_credentials WHERE user_id = %s and is_active = %s",
+        (1, True),
+        ["idx_gmail_credentials_user_active"],
+    ),
+    (
+        "UserDB.get_transaction_categories",
+        "SELECT id, category FROM transaction_category WHERE user_id = %s AND is_active = %s",
+        (1, True),
+        ["idx_transaction_category_user_active"],
+    ),
+    (
+        "is_message_already_processed",
+        """
+        SELECT 1 FROM workflow_run
+        WHERE user_id = %s AND email_message_id = %s AND run_status = 'success'
+          AND email_datetime = %s
+        LIMIT 1
+        """,
+        (1, "message-id", "2025-09-13 14:36:01+05:30"),
+        ["idx_workflow_run_user_success"],
+    ),
+    (
+        "UserDB.get_user_transactions",
+        """
+        SELECT * FROM user_transactions
+        WHERE user_id = %s
+        ORDER BY transaction_at DESC, id DESC
+        """,
+        (1,),
+        ["idx_user_transactions_user_at"],
+    ),
+    (
+        "UserDB.get_user_transactions next page",
+        """
+        SELECT id FROM user_transactions
+        WHERE user_id = %s AND (transaction_at, id) < (%s, %s)
+        ORDER BY transaction_at DESC, id DESC
+        LIMIT 51
+        """,
+        (1, "2025-09-13 14:36:01+05:30", 100),
+        ["idx_user_transactions_user_at"],
+    ),
+    (
+        "UserDB.get_user_transactions by category",
+        """
+        SELECT id FROM user_transactions
+        WHERE user_id = %s AND transaction_category = %s AND (transaction_at, id) < (%s, %s)
+        ORDER BY transaction_at DESC, id DESC
+        LIMIT 51
+        """,
+        (1, "Food", "2025-09-13 14:36:01+05:30", 100),
+        ["idx_user_transactions_user_category_at"],
+    ),
+    (
+        "UserDB.search_transactions",
+        """
+        SELECT id, word_similarity(%s, counterparty) AS score
+        FROM user_transactions
+        WHERE user_id = %s AND (counterparty ILIKE %s OR %s <%% counterparty)
+        ORDER BY score DESC, transaction_at DESC, id DESC
+        LIMIT 51
+        """,
+        ("swiggy", 1, "%swiggy%", "swiggy"),
+        ["idx_user_transactions_counterparty_trgm"],
+    ),
+    (
+        "user_transactions date range",
+        """
+        SELECT date_trunc('month', transaction_at) AS month, SUM(amount)
+        FROM user_transactions
+        WHERE user_id = %s AND transaction_at >= %s AND transaction_at < %s
+        GROUP BY 1
+        """,
+        (1, "2025-01-01", "2026-01-01"),
+        ["idx_user_transactions_user_at"],
+    ),
+    (
+        "UserDB.get_spending_summary",
+        """
+        SELECT month, transaction_category, transaction_type, total, transaction_count
+        FROM user_spending_rollup
+        WHERE user_id = %s AND month >= %s
+        ORDER BY month DESC
+        """,
+        (1, "2025-01-01"),
+        ["user_spending_rollup_pkey"],
+    ),
+    (
+        "schedule_due_polls",
+        "SELECT user_id FROM user_poll_schedule WHERE next_poll_at <= now()",
+        (),
+        ["idx_user_poll_schedule_next_poll"],
+    ),
+    (
+        "user context loader",
+        USER_CONTEXT_QUERY,
+        ([1, 2],),
+        ["idx_gmail_credentials_user_active", "idx_transaction_category_user_active"],
+    ),
+]
+
+
+def get_connection():
+    return psycopg2.connect(
+        host=os.getenv("DB_HOST", "localhost"),
+        port=os.getenv("DB_PORT", 5432),
+        dbname=os.getenv("DB_NAME"),
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+    )
+
+
+def discover_migrations():
+    """Return [(version, name, path)] for the base schema and migrations/, sorted by version"""
+    migrations = [("0000", "base_schema", BASE_SCHEMA)]
+    for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+        match = MIGRATION_FILE_PATTERN.match(path.name)
+        if not match:
+            raise ValueError(f"Migration file name must look like NNNN_name.sql: {path.name}")
+        migrations.append((match.group(1), match.group(2), path))
+
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError(f"Duplicate migration versions in {MIGRATIONS_DIR}")
+    return migrations
+
+
+def ensure_migrations_table(conn):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                checksum TEXT NOT NULL,
+                applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+            """
+        )
+    conn.commit()
+
+
+def get_applied_migrations(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT version, checksum FROM schema_migrations")
+        return dict(cursor.fetchall())
+
+
+def _split_statements(sql):
+    """
+    Split a no-transaction migration into statements
+
+    Only used for no-transaction files, which never contain $$ bodies or
+    "--" inside string literals. Comments are removed before splitting on
+    ";", so a ";" inside a comment can't end a statement.
+
+    Returns:
+        list: Statements without comments or the trailing ";"
+    """
+    lines = [line.split("--", 1)[0] for line in sql.splitlines()]
+    return [
+        statement.strip()
+        for statement in "\n".join(lines).split(";")
+        if statement.strip()
+    ]
+
+
+def _checksum(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def apply_migration(conn, version, name, path):
+    sql = path.read_text()
+    checksum = _checksum(path)
+
+    if sql.lstrip().startswith(NO_TRANSACTION_MARKER):
+        # Close the transaction left open by earlier reads before leaving it
+        conn.commit()
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cursor:
+                for statement in _split_statements(sql):
+                    cursor.execute(statement)
+        finally:
+            conn.autocommit = False
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                (version, name, checksum),
+            )
+        conn.commit()
+    else:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(sql)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                    (version, name, checksum),
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+
+def migrate():
+    """Apply all pending migrations, returns the list of applied versions"""
+    applied_now = []
+    with get_connection() as conn:
+        ensure_migrations_table(conn)
+        applied = get_applied_migrations(conn)
+
+        for version, name, path in discover_migrations():
+            if version in applied:
+                if _checksum(path) != applied[version]:
+                    print(f"⚠️  Migration {version}_{name} changed after it was applied")
+                continue
+
+            print(f"🔄 Applying {version}_{name}...")
+            apply_migration(conn, version, name, path)
+            applied_now.append(version)
+            print(f"✅ Applied {version}_{name}")
+
+    conn.close()
+    if not applied_now:
+        print("✅ Database schema is up to date")
+    return applied_now
+
+
+def show_status():
+    with get_connection() as conn:
+        ensure_migrations_table(conn)
+        applied = get_applied_migrations(conn)
+    conn.close()
+
+    for version, name, _ in discover_migrations():
+        state = "applied" if version in applied else "pending"
+        print(f"{version}_{name}: {state}")
+
+
+def _plan_index_names(plan):
+    names = set()
+    if "Index Name" in plan:
+        names.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        names |= _plan_index_names(child)
+    return names
+
+
+def _index_family(cursor, index_name):
+    """An index plus the per-partition indexes attached to it"""
+    cursor.execute(
+        """
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = %s
+        """,
+        (index_name,),
+    )
+    return {index_name} | {row[0] for row in cursor.fetchall()}
+
+
+def check_index_usage():
+    """
+    EXPLAIN each hot query and assert its plan uses the expected indexes.
+
+    Sequential scans are disabled for the session so the check is meaningful
+    on a small local database, where the planner would otherwise prefer to
+    scan a handful of rows. On partitioned tables the partition's copy of the
+    expected index counts.
+    """
+    ok = True
+    with get_connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SET enable_seqscan = off")
+            for description, query, params, expected in INDEX_CHECKS:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {query}", params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                used = _plan_index_names(plan[0]["Plan"])
+                missing = [
+                    index
+                    for index in expected
+                    if not used & _index_family(cursor, index)
+                ]
+
+                if missing:
+                    ok = False
+                    print(f"❌ {description}: missing {', '.join(missing)} (used: {sorted(used)})")
+                else:
+                    print(f"✅ {description}: {', '.join(expected)}")
+        conn.rollback()
+    conn.close()
+    return ok
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Apply database migrations")
+    arg_parser.add_argument("--status", action="store_true", help="List applied and pending migrations")
+    arg_parser.add_argument(
+        "--check-indexes", action="store_true", help="Assert hot queries use their indexes"
+    )
+    args = arg_parser.parse_args()
+
+    if args.status:
+        show_status()
+    elif args.check_indexes:
+        sys.exit(0 if check_index_usage() else 1)
+    else:
+        migrate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Monthly partition maintenance for workflow_run.
+
+Pre-creates the next WORKFLOW_RUN_PARTITIONS_AHEAD months of partitions and
+drops whole months older than WORKFLOW_RUN_RETENTION_MONTHS (0 keeps
+everything). Rows that landed in the default partition (months that were never
+pre-created, e.g. a backfill of old mail) are first moved into partitions of
+their own; a non-empty default partition would otherwise block creating those
+months. Safe to run as often as you like; intended to be scheduled daily.
+
+Usage:
+    python -m workflow.partition_maintenance
+"""
+
+import os
+from dotenv import load_dotenv
+from workflow.client.postgres_client import PostgresClient
+
+load_dotenv()
+
+
+def maintain_workflow_run_partitions(months_ahead=None, retention_months=None):
+    """
+    Create upcoming workflow_run partitions and apply the retention policy.
+
+    Returns:
+        dict: {"moved": rows moved out of the default partition,
+               "created": partitions created, "dropped": partitions dropped}
+    """
+    if months_ahead is None:
+        months_ahead = int(os.getenv("WORKFLOW_RUN_PARTITIONS_AHEAD", 3))
+    if retention_months is None:
+        retention_months = int(os.getenv("WORKFLOW_RUN_RETENTION_MONTHS", 12))
+
+    pg_client = PostgresClient.from_env()
+
+    result = pg_client.execute_query("SELECT drain_workflow_run_default() AS moved;")
+    moved = result[0]["moved"] if result else 0
+    if moved:
+        print(f"⚠️  Moved {moved} workflow_run rows out of the default partition")
+
+    result = pg_client.execute_query(
+        "SELECT ensure_workflow_run_partitions(CURRENT_DATE, %s) AS created;",
+        (months_ahead,),
+    )
+    created = result[0]["created"] if result else 0
+
+    dropped = 0
+    if retention_months > 0:
+        result = pg_client.execute_query(
+            "SELECT drop_workflow_run_partitions_older_than(%s) AS dropped;",
+            (retention_months,),
+        )
+        dropped = result[0]["dropped"] if result else 0
+
+    return {"moved": moved, "created": created, "dropped": dropped}
+
+
+if __name__ == "__main__":
+    print(maintain_workflow_run_partitions())
@@ -0,0 +1,335 @@
+"""
+Staged expense-tracker pipeline: fetch -> classify -> categorize -> persist.
+
+Each stage is a Celery task routed to its own queue (see PIPELINE_QUEUES in
+workflow/celery_app.py), so Gmail quota, LLM concurrency, Telegram waits and
+DB writes scale with separate worker pools instead of one run holding them
+all. Stages hand a JSON payload down the line:
+
+    {"user_id", "lease_token", "job_id", "run_start_datetime", "email_data",
+     "transaction_info", "transaction_category"}
+
+The per-user lease taken by fetch travels with the payload; every stage
+renews it and persist (or the final failure of any stage) releases it. Runs
+dispatched from the fair queue (workflow/fair_queue.py) also carry their
+job_id, and the user's in-flight slot is freed at the same points.
+"""
+
+import os
+from datetime import datetime, timezone
+from workflow.celery_app import app
+from workflow.client.logging_client import MonyLogger
+from workflow.client.redis_lock import (
+    acquire_lease,
+    record_workflow_metric,
+    release_lease,
+    renew_lease,
+    user_lock_key,
+)
+from workflow.expense_tracker import (
+    build_user_transaction,
+    build_workflow_run,
+    check_finance_email,
+    get_user_last_email_epoch,
+    identify_transaction_category,
+    insert_user_transaction_to_db,
+    is_message_already_processed,
+    log_user_workflow_run,
+    read_gmail,
+)
+from workflow.fair_queue import complete_job, submit_job
+from workflow.poll_schedule import record_poll
+from workflow.user_context import user_context_cache
+
+# A pipelined run waits in up to four queues, so its lease outlives a single
+# task; each stage renews it for another full period
+PIPELINE_LEASE_SECONDS = int(os.getenv("WORKFLOW_PIPELINE_LEASE_SECONDS", 900))
+
+# Backpressure: fetch stops pulling new email while a downstream queue is this deep
+STAGE_MAX_BACKLOG = {
+    "classify": int(os.getenv("WORKFLOW_CLASSIFY_MAX_BACKLOG", 200)),
+    "categorize": int(os.getenv("WORKFLOW_CATEGORIZE_MAX_BACKLOG", 200)),
+    "persist": int(os.getenv("WORKFLOW_PERSIST_MAX_BACKLOG", 500)),
+}
+
+GMAIL_QUERY = "in:inbox category:primary"
+
+# A user whose last processed email is older than this is catching up on a
+# backlog, so their next fetch goes to the fair queue's backfill lane
+LIVE_EMAIL_MAX_AGE_SECONDS = int(os.getenv("WORKFLOW_LIVE_EMAIL_MAX_AGE_SECONDS", 3600))
+
+
+def queue_depth(queue):
+    """Messages waiting in a broker queue (0 when it doesn't exist yet)"""
+    try:
+        with app.connection_for_read() as conn:
+            return conn.default_channel.queue_declare(
+                queue=queue, passive=True
+            ).message_count
+    except Exception:
+        # Redis drops the list of an empty queue, and a passive declare of a
+        # missing queue raises
+        return 0
+
+
+def downstream_backlog():
+    """Stage queues deeper than their STAGE_MAX_BACKLOG, with their depth"""
+    depths = {queue: queue_depth(queue) for queue in STAGE_MAX_BACKLOG}
+    return {
+        queue: depth
+        for queue, depth in depths.items()
+        if depth >= STAGE_MAX_BACKLOG[queue]
+    }
+
+
+def _renew(payload):
+    """
+    Extend the run's lease; a lost lease is counted but the run carries on
+    (both writes are upserts, so a duplicate run can't double-insert)
+    """
+    try:
+        key = user_lock_key(payload["user_id"])
+        if not renew_lease(key, payload["lease_token"], PIPELINE_LEASE_SECONDS):
+            record_workflow_metric("lease_lost", user_id=payload["user_id"])
+    except Exception as e:
+        print(f"❌ Failed to renew lease for user {payload['user_id']}: {e}")
+
+
+def _release(user_id, token):
+    try:
+        release_lease(user_lock_key(user_id), token)
+    except Exception as e:
+        print(f"❌ Failed to release lease for user {user_id}: {e}")
+
+
+def _finish(user_id, token, job_id):
+    """End of a run: release the lease and free the fair-queue slot"""
+    if token:
+        _release(user_id, token)
+    complete_job(user_id, job_id)
+
+
+def _requeue_fetch(user_id, job_id, lane):
+    """
+    Put a fetch that couldn't run back in the fair queue, in the same lane,
+    so a backfill drain doesn't stall until the user's next poll
+    """
+    # Queue first: completing the job first could drop the user as idle
+    submit_job(user_id, fetch.name, args=[user_id], lane=lane, unique=True)
+    complete_job(user_id, job_id)
+
+
+def _next_fetch_lane(email_data):
+    """backfill while the user's mail is older than LIVE_EMAIL_MAX_AGE_SECONDS"""
+    try:
+        received = datetime.fromisoformat(email_data["email_received_datetime"])
+    except (KeyError, TypeError, ValueError):
+        return "live"
+    if received.tzinfo is None:
+        received = received.replace(tzinfo=timezone.utc)
+    age = (datetime.now(timezone.utc) - received).total_seconds()
+    return "backfill" if age > LIVE_EMAIL_MAX_AGE_SECONDS else "live"
+
+
+def _log_run(payload, run_status, error_message=""):
+    log_user_workflow_run(
+        data=build_workflow_run(
+            payload["user_id"],
+            payload["email_data"],
+            payload["transaction_info"],
+            payload["run_start_datetime"],
+            datetime.now(),
+            run_status,
+            error_message,
+        )
+    )
+
+
+class StageTask(app.Task):
+    """
+    Base for pipeline stages: retries with exponential backoff and jitter;
+    once retries are exhausted the run is logged as failed (when the email was
+    already classified, like run_user_workflow), the user's lease released and
+    their fair-queue slot freed.
+    """
+
+    autoretry_for = (Exception,)
+    retry_backoff = True
+    retry_backoff_max = 300
+    retry_jitter = True
+
+    def on_failure(self, exc, task_id, args, kwargs, einfo):
+        payload = args[0] if args else None
+        if not isinstance(payload, dict):
+            # fetch(user_id, job_id=..., lane=...): its own error path released the lease
+            if args:
+                complete_job(args[0], kwargs.get("job_id"))
+            return
+        record_workflow_metric(f"{self.name.rsplit('.', 1)[-1]}_failed")
+        try:
+            if payload.get("transaction_info"):
+                _log_run(payload, "failure", str(exc))
+        except Exception as e:
+            print(f"❌ Failed to log failed run for user {payload['user_id']}: {e}")
+        finally:
+            _finish(payload["user_id"], payload["lease_token"], payload.get("job_id"))
+
+
+@app.task(
+    name="workflow.pipeline.fetch",
+    base=StageTask,
+    max_retries=3,
+    ignore_result=True,
+)
+def fetch(user_id, job_id=None, lane="live"):
+    """
+    Stage 1 (Gmail): take the user's lease, read their next email after the
+    watermark and hand it to classify.
+
+    While another run holds the lease or a downstream queue is over its backlog
+    limit nothing is fetched, and the job goes back to its fair-queue lane; the
+    dispatcher holds it while the backlog lasts.
+    """
+    backlog = downstream_backlog()
+    if backlog:
+        record_workflow_metric("backpressure", user_id=user_id)
+        print(f"⚠️  Deferring fetch for user {user_id}, backlog: {backlog}")
+        _requeue_fetch(user_id, job_id, lane)
+        return
+
+    token = acquire_lease(user_lock_key(user_id), PIPELINE_LEASE_SECONDS)
+    if not token:
+        record_workflow_metric("skipped_locked", user_id=user_id)
+        _requeue_fetch(user_id, job_id, lane)
+        return
+
+    logger = MonyLogger(user_id)
+    try:
+        run_start_time = datetime.now()
+        user_context_cache.get(user_id, refresh=True)
+        email_data = read_gmail(
+            user_id=user_id,
+            epoch_time=get_user_last_email_epoch(user_id=user_id),
+            query=GMAIL_QUERY,
+        )
+        record_poll(user_id)
+        if not email_data:
+            logger.info("No unread emails found")
+            _finish(user_id, token, job_id)
+            return
+
+        if is_message_already_processed(
+            user_id,
+            email_data["message_id"],
+            email_datetime=email_data.get("email_received_datetime"),
+        ):
+            logger.info(f"Email {email_data['message_id']} already processed, skipping.")
+            _finish(user_id, token, job_id)
+            return
+
+        received = email_data.get("email_received_datetime")
+        if isinstance(received, datetime):
+            email_data["email_received_datetime"] = received.isoformat()
+
+        logger.info(f"Fetched email subject: {email_data['subject']}")
+        classify.delay(
+            {
+                "user_id": user_id,
+                "lease_token": token,
+                "job_id": job_id,
+                "run_start_datetime": run_start_time.isoformat(),
+                "email_data": email_data,
+                "transaction_info": {},
+                "transaction_category": None,
+            }
+        )
+    except Exception:
+        # The retry takes the lease again
+        _release(user_id, token)
+        raise
+
+
+@app.task(
+    name="workflow.pipeline.classify",
+    base=StageTask,
+    max_retries=5,
+    ignore_result=True,
+)
+def classify(payload):
+    """Stage 2 (LLM): decide whether the email is a transaction and extract it"""
+    _renew(payload)
+    transaction_info = check_finance_email(gmail_data=payload["email_data"])
+
+    # The body is only needed here; don't carry it through two more queues.
+    # Copy rather than mutate: a retry of this task needs the original payload
+    email_data = dict(payload["email_data"])
+    email_data.pop("html_body", None)
+    payload = {**payload, "email_data": email_data, "transaction_info": transaction_info}
+
+    if transaction_info["is_finance_email"]:
+        categorize.delay(payload)
+    else:
+        MonyLogger(payload["user_id"]).info("Not a finance email, skipping.")
+        persist.delay(payload)
+
+
+@app.task(
+    name="workflow.pipeline.categorize",
+    base=StageTask,
+    max_retries=2,
+    ignore_result=True,
+)
+def categorize(payload):
+    """Stage 3 (Telegram / LLM): pick the transaction's category"""
+    _renew(payload)
+    transaction_category = identify_transaction_category(
+        payload["user_id"], payload["transaction_info"]
+    )
+    MonyLogger(payload["user_id"]).info(
+        f"Transaction categorized as: {transaction_category}"
+    )
+    payload["transaction_category"] = transaction_category
+    persist.delay(payload)
+
+
+@app.task(
+    name="workflow.pipeline.persist",
+    base=StageTask,
+    max_retries=5,
+    ignore_result=True,
+)
+def persist(payload):
+    """
+    Stage 4 (DB): save the transaction, log the run (advancing the email
+    watermark), release the lease and queue the user's next fetch.
+    """
+    _renew(payload)
+    user_id = payload["user_id"]
+    logger = MonyLogger(user_id)
+    transaction_info = payload["transaction_info"]
+
+    if transaction_info.get("is_finance_email"):
+        transaction_pk = insert_user_transaction_to_db(
+            build_user_transaction(
+                user_id, transaction_info, payload["transaction_category"]
+            )
+        )
+        logger.info(f"Transaction saved with PK={transaction_pk}")
+        transaction_info["transaction_pk"] = transaction_pk
+
+    _log_run(payload, "success")
+    logger.info(
+        f"Email message id: {payload['email_data'].get('message_id')} logged to workflow run"
+    )
+    _finish(user_id, payload["lease_token"], payload.get("job_id"))
+    record_workflow_metric("runs", user_id=user_id)
+
+    # One email per pass: drain a backlog without waiting for the next poll,
+    # through the fair queue so a long backlog can't crowd out other users
+    submit_job(
+        user_id,
+        fetch.name,
+        args=[user_id],
+        lane=_next_fetch_lane(payload["email_data"]),
+        unique=True,
+    )
@@ -0,0 +1,176 @@
+"""
+Adaptive per-user polling.
+
+Rather than polling every inbox on every beat tick, each user has a
+next_poll_at in user_poll_schedule. When it passes, the user is polled and
+rescheduled from their recent email arrival rate (emails logged to
+workflow_run over the last WORKFLOW_POLL_RATE_WINDOW_DAYS):
+
+  - an email in the last WORKFLOW_POLL_ACTIVE_SECONDS -> the minimum interval
+  - otherwise roughly one poll per WORKFLOW_POLL_EMAILS_PER_POLL expected emails
+  - no emails in the window                         -> the maximum interval
+
+clamped to [WORKFLOW_POLL_MIN_SECONDS, WORKFLOW_POLL_MAX_SECONDS] and spread
+by +/- WORKFLOW_POLL_JITTER so users don't fall into lockstep.
+
+Picking a user only pushes their next_poll_at WORKFLOW_POLL_RETRY_SECONDS
+out; the full interval starts when fetch actually reads the inbox
+(record_poll). A poll that never ran (already queued, lease taken,
+backpressure) is therefore retried soon instead of an interval later.
+
+Usage:
+    python -m workflow.poll_schedule --user-id 11
+"""
+
+import argparse
+import os
+import random
+from datetime import datetime, timedelta
+import pytz
+from dotenv import load_dotenv
+from workflow.client.postgres_client import PostgresClient
+
+load_dotenv()
+
+POLL_MIN_SECONDS = int(os.getenv("WORKFLOW_POLL_MIN_SECONDS", 60))
+POLL_MAX_SECONDS = int(os.getenv("WORKFLOW_POLL_MAX_SECONDS", 3600))
+POLL_ACTIVE_SECONDS = int(os.getenv("WORKFLOW_POLL_ACTIVE_SECONDS", 3600))
+POLL_EMAILS_PER_POLL = float(os.getenv("WORKFLOW_POLL_EMAILS_PER_POLL", 0.1))
+POLL_RATE_WINDOW_DAYS = int(os.getenv("WORKFLOW_POLL_RATE_WINDOW_DAYS", 7))
+POLL_JITTER = float(os.getenv("WORKFLOW_POLL_JITTER", 0.1))
+POLL_RETRY_SECONDS = int(os.getenv("WORKFLOW_POLL_RETRY_SECONDS", 120))
+
+DUE_POLLS_QUERY = """
+    SELECT
+        w.user_id,
+        s.interval_seconds,
+        m.last_email_datetime,
+        a.emails
+    FROM workflow w
+    LEFT JOIN user_poll_schedule s ON s.user_id = w.user_id
+    LEFT JOIN user_email_watermark m ON m.user_id = w.user_id
+    LEFT JOIN LATERAL (
+        SELECT count(*) AS emails
+        FROM workflow_run r
+        WHERE r.user_id = w.user_id
+          AND r.email_datetime >= now() - make_interval(days => %s)
+    ) a ON TRUE
+    WHERE w.is_active = TRUE
+      AND (s.next_poll_at IS NULL OR s.next_poll_at <= now())
+    ORDER BY w.user_id;
+"""
+
+
+def compute_poll_interval(emails_per_day, last_email_datetime=None, now=None):
+    """
+    Seconds until a user's next poll, before jitter
+
+    Args:
+        emails_per_day (float): Recent email arrival rate
+        last_email_datetime (datetime, optional): Newest processed email (tz-aware)
+        now (datetime, optional): Current time (tz-aware), defaults to now
+
+    Returns:
+        int: Interval within [POLL_MIN_SECONDS, POLL_MAX_SECONDS]
+    """
+    now = now or datetime.now(pytz.utc)
+    if last_email_datetime and (now - last_email_datetime).total_seconds() < POLL_ACTIVE_SECONDS:
+        return POLL_MIN_SECONDS
+    if emails_per_day <= 0:
+        return POLL_MAX_SECONDS
+
+    interval = 86400 * POLL_EMAILS_PER_POLL / emails_per_day
+    return int(min(max(interval, POLL_MIN_SECONDS), POLL_MAX_SECONDS))
+
+
+def schedule_due_polls():
+    """
+    Pick the active users due for a poll and store their new interval
+
+    Their next_poll_at only moves POLL_RETRY_SECONDS ahead; record_poll
+    starts the interval once the poll has run. Changed intervals bump
+    user_data_version, so /api/workflow's ETag notices.
+
+    Returns:
+        list: [{"user_id", "interval_seconds"}] of users to poll now
+    """
+    pg_client = PostgresClient.from_env()
+    rows = pg_client.execute_query(DUE_POLLS_QUERY, (POLL_RATE_WINDOW_DAYS,))
+    if not rows:
+        return []
+
+    now = datetime.now(pytz.utc)
+    schedules, changed = [], []
+    for row in rows:
+        emails_per_day = row["emails"] / POLL_RATE_WINDOW_DAYS
+        interval = compute_poll_interval(
+            emails_per_day, row["last_email_datetime"], now=now
+        )
+        schedules.append(
+            {
+                "user_id": row["user_id"],
+                "interval_seconds": interval,
+                "emails_per_day": round(emails_per_day, 2),
+                "next_poll_at": now + timedelta(seconds=POLL_RETRY_SECONDS),
+                "updated_at": now,
+            }
+        )
+        if row["interval_seconds"] != interval:
+            changed.append(row["user_id"])
+
+    pg_client.insert_or_update_many(
+        table="user_poll_schedule",
+        rows=schedules,
+        conflict_columns=["user_id"],
+        pk_column="user_id",
+    )
+    if changed:
+        pg_client.execute_query(
+            """
+            INSERT INTO user_data_version AS v (user_id)
+            SELECT unnest(%s::INT[])
+            ON CONFLICT (user_id) DO UPDATE SET version = v.version + 1, updated_at = now();
+            """,
+            (changed,),
+        )
+
+    return [
+        {"user_id": s["user_id"], "interval_seconds": s["interval_seconds"]}
+        for s in schedules
+    ]
+
+
+def record_poll(user_id):
+    """Start the user's poll interval (with jitter) after their inbox was read"""
+    pg_client = PostgresClient.from_env()
+    pg_client.execute_query(
+        """
+        UPDATE user_poll_schedule
+        SET next_poll_at = now() + make_interval(secs => interval_seconds * %s),
+            updated_at = now()
+        WHERE user_id = %s;
+        """,
+        (random.uniform(1 - POLL_JITTER, 1 + POLL_JITTER), user_id),
+    )
+
+
+def get_poll_schedule(user_id):
+    """A user's current poll schedule, or None before their first poll"""
+    pg_client = PostgresClient.from_env()
+    rows = pg_client.execute_query(
+        """
+        SELECT user_id, interval_seconds, emails_per_day, next_poll_at, updated_at
+        FROM user_poll_schedule
+        WHERE user_id = %s;
+        """,
+        (user_id,),
+    )
+    return rows[0] if rows else None
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Show a user's poll schedule")
+    arg_parser.add_argument("--user-id", type=int, required=True)
+    args = arg_parser.parse_args()
+
+    print(get_poll_schedule(args.user_id) or "⚠️  No poll schedule yet (due at the next tick)")
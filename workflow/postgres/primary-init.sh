@@ -0,0 +1,4 @@
+#!/bin/bash
+# Allow the local replica to stream WAL from this primary (docker-compose only)
+set -e
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
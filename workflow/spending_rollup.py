@@ -0,0 +1,38 @@
+"""
+Rebuild the user_spending_rollup table from user_transactions.
+
+Triggers keep the rollup current on every insert, update and delete, so this
+is only needed after out-of-band changes (TRUNCATE, restores, trigger changes).
+
+Usage:
+    python -m workflow.spending_rollup               # every user
+    python -m workflow.spending_rollup --user-id 11  # one user
+"""
+
+import argparse
+from dotenv import load_dotenv
+from workflow.client.postgres_client import PostgresClient
+
+load_dotenv()
+
+
+def rebuild_spending_rollup(user_id=None):
+    """
+    Recompute spending rollups for one user, or all users when user_id is None.
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    pg_client = PostgresClient.from_env()
+    result = pg_client.execute_query(
+        "SELECT rebuild_user_spending_rollup(%s) AS rebuilt;", (user_id,)
+    )
+    return result[0]["rebuilt"] if result else 0
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Rebuild spending rollups")
+    arg_parser.add_argument("--user-id", type=int, help="Only rebuild this user")
+    args = arg_parser.parse_args()
+
+    print(f"✅ Rebuilt {rebuild_spending_rollup(args.user_id)} spending rollup rows")
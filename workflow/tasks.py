@@ -0,0 +1,97 @@
+"""
+Celery tasks for the expense-tracker workflow (see workflow/celery_app.py).
+"""
+
+import os
+from workflow.celery_app import app, WORKFLOW_POLL_INTERVAL_SECONDS
+from workflow.client.redis_lock import LeaseLock, record_workflow_metric, user_lock_key
+from workflow.expense_tracker import run_user_workflow
+from workflow.fair_queue import dispatch_jobs, submit_job
+from workflow.partition_maintenance import maintain_workflow_run_partitions
+from workflow.pipeline import downstream_backlog, fetch, queue_depth
+from workflow.poll_schedule import schedule_due_polls
+
+
+@app.task(name="workflow.tasks.enqueue_active_user_workflows", ignore_result=True)
+def enqueue_active_user_workflows():
+    """
+    Beat task: queue one pipelined run (fetch stage) in the fair queue's live
+    lane per active user whose adaptive poll is due (see workflow/poll_schedule.py)
+    """
+    due = schedule_due_polls()
+    queued = 0
+    for poll in due:
+        # A user whose previous poll is still waiting doesn't need a second one
+        queued += submit_job(poll["user_id"], fetch.name, args=[poll["user_id"]], unique=True)
+    print(f"✅ Queued workflow runs for {queued} of {len(due)} due users")
+    return queued
+
+
+# Most fetches waiting in the broker at once; the fair order only holds for
+# work that is still in the fair queue, so the broker queue is kept short
+WORKFLOW_DISPATCH_BATCH = int(os.getenv("WORKFLOW_DISPATCH_BATCH", 50))
+
+
+@app.task(name="workflow.tasks.dispatch_workflow_jobs", ignore_result=True)
+def dispatch_workflow_jobs():
+    """
+    Beat task: move jobs from the fair queue (workflow/fair_queue.py) to the
+    broker, live lane first, fairly across users and within per-user caps
+    """
+    backlog = downstream_backlog()
+    if backlog:
+        print(f"⚠️  Holding workflow dispatch, backlog: {backlog}")
+        return 0
+
+    jobs = dispatch_jobs(WORKFLOW_DISPATCH_BATCH - queue_depth("fetch"))
+    for job in jobs:
+        app.send_task(
+            job["task"],
+            args=job["args"],
+            kwargs={"job_id": job["job_id"], "lane": job["lane"]},
+        )
+        record_workflow_metric(f"dispatched_{job['lane']}", user_id=job["user_id"])
+    return len(jobs)
+
+
+# Lease on a user's workflow; the heartbeat renews it every third of this
+WORKFLOW_LOCK_TTL_SECONDS = int(os.getenv("WORKFLOW_LOCK_TTL_SECONDS", 120))
+
+
+@app.task(name="workflow.tasks.run_user_workflow")
+def run_user_workflow_task(user_id):
+    """
+    Process the user's next unread email in a single task; re-enqueue at once
+    while the inbox has more. The beat fan-out uses the staged pipeline
+    (workflow/pipeline.py) instead; this is for one-off runs.
+
+    Holds a per-user Redis lease for the whole run, so a slow run (e.g. waiting
+    on Telegram) and the next tick never process the same email twice. A run
+    that finds the lease taken is skipped and counted as `skipped_locked`.
+    """
+    with LeaseLock(
+        user_lock_key(user_id), ttl_seconds=WORKFLOW_LOCK_TTL_SECONDS
+    ) as lease:
+        if not lease.acquired:
+            record_workflow_metric("skipped_locked", user_id=user_id)
+            return {"status": "skipped", "error": "workflow already running"}
+
+        result = run_user_workflow(user_id)
+        if lease.lost:
+            record_workflow_metric("lease_lost", user_id=user_id)
+        record_workflow_metric("runs", user_id=user_id)
+
+    # Each run handles one email, so drain a backlog without waiting for the next
+    # tick; only after a logged run (which advances the email watermark) and only
+    # once the lease is released, or the follow-up would be skipped
+    if result["status"] == "success" and result["transaction_info"]:
+        run_user_workflow_task.apply_async(
+            (user_id,), expires=WORKFLOW_POLL_INTERVAL_SECONDS
+        )
+    return result
+
+
+@app.task(name="workflow.tasks.maintain_partitions", ignore_result=True)
+def maintain_partitions():
+    """Daily: create upcoming workflow_run partitions and apply retention"""
+    return maintain_workflow_run_partitions()
@@ -0,0 +1,149 @@
+"""
+Single Telegram update consumer that routes replies to the waiting chat.
+
+getUpdates is bot-wide: every poller advances the same offset, and
+concurrent pollers get 409 Conflict and consume each other's replies. So
+exactly one router process long-polls the bot and pushes each text message
+to a Redis list for its chat, but only while a categorize task is waiting
+on that chat. Workers (any number, any concurrency) send their prompt and
+block on their own chat's list.
+
+The router holds a Redis lease, so a second copy just waits as a standby.
+The update offset lives in Redis and survives restarts.
+
+Usage:
+    python -m workflow.telegram_router
+"""
+
+import os
+import time
+from dotenv import load_dotenv
+from workflow.client.redis_lock import LeaseLock, get_redis_client
+from workflow.client.telegram_client import TelegramClient
+
+load_dotenv()
+
+TELEGRAM_NAMESPACE = "mony:telegram"
+OFFSET_KEY = f"{TELEGRAM_NAMESPACE}:offset"
+ROUTER_LOCK_KEY = f"{TELEGRAM_NAMESPACE}:router"
+
+# getUpdates long-poll timeout
+POLL_TIMEOUT_SECONDS = 25
+# BLPOP wait per loop in workers; below get_redis_client's 5 s socket timeout
+REPLY_POLL_SECONDS = 3
+
+
+def _waiting_key(chat_id):
+    return f"{TELEGRAM_NAMESPACE}:waiting:{chat_id}"
+
+
+def _replies_key(chat_id):
+    return f"{TELEGRAM_NAMESPACE}:replies:{chat_id}"
+
+
+def route_updates(updates):
+    """
+    Push text messages to the reply list of chats with a waiting prompt
+
+    Returns:
+        int: The offset to ask for next (last update_id + 1), or None
+    """
+    client = get_redis_client()
+    next_offset = None
+    for update in updates:
+        next_offset = update["update_id"] + 1
+        msg = update.get("message")
+        if not msg or "text" not in msg:
+            continue
+
+        chat_id = msg["chat"]["id"]
+        # Replies to chats nobody is waiting on are dropped, so a stale answer
+        # can't be taken as the answer to the next prompt
+        if client.exists(_waiting_key(chat_id)):
+            pipe = client.pipeline()
+            pipe.rpush(_replies_key(chat_id), msg["text"])
+            pipe.expire(_replies_key(chat_id), 600)
+            pipe.execute()
+    return next_offset
+
+
+def run_update_router():
+    """Long-poll getUpdates forever and route replies per chat"""
+    telegram = TelegramClient(os.getenv("TELEGRAM_BOT_TOKEN"))
+    client = get_redis_client()
+
+    with LeaseLock(ROUTER_LOCK_KEY, ttl_seconds=60) as lease:
+        while not lease.acquired:
+            print("⚠️  Another Telegram router is running, waiting...")
+            time.sleep(30)
+            lease.acquire()
+
+        print("✅ Telegram router started")
+        while not lease.lost:
+            offset = client.get(OFFSET_KEY)
+            updates = telegram.get_updates(
+                offset=int(offset) if offset else None, timeout=POLL_TIMEOUT_SECONDS
+            )
+            if not updates or not updates.get("result"):
+                continue
+
+            next_offset = route_updates(updates["result"])
+            if next_offset:
+                client.set(OFFSET_KEY, next_offset)
+
+        print("❌ Telegram router lost its lease, exiting")
+
+
+def wait_for_selection(
+    chat_id,
+    message,
+    predefined_options,
+    parse_mode=None,
+    timeout_minutes=1,
+    buttons_per_row=3,
+):
+    """
+    Prompt a chat with option buttons and wait for the reply routed to it
+
+    Same behaviour and result as TelegramClient.wait_for_selection_or_custom_input,
+    but safe to call from many workers at once.
+
+    Returns:
+        dict: {"type": "predefined"|"custom", "value": selected_text}, or None on timeout
+    """
+    telegram = TelegramClient(os.getenv("TELEGRAM_BOT_TOKEN"))
+    client = get_redis_client()
+    timeout_seconds = timeout_minutes * 60
+
+    # Register before prompting so a fast reply isn't dropped by the router
+    client.set(_waiting_key(chat_id), 1, ex=timeout_seconds + 30)
+    client.delete(_replies_key(chat_id))
+    try:
+        sent = telegram.send_selection_prompt(
+            chat_id, message, predefined_options, parse_mode, buttons_per_row
+        )
+        if not sent:
+            return None
+
+        deadline = time.time() + timeout_seconds
+        custom_input_mode = False
+        while time.time() < deadline:
+            wait = max(1, min(REPLY_POLL_SECONDS, int(deadline - time.time())))
+            reply = client.blpop(_replies_key(chat_id), timeout=wait)
+            if not reply:
+                continue
+
+            result, custom_input_mode = telegram.handle_selection_reply(
+                chat_id, reply[1], predefined_options, custom_input_mode
+            )
+            if result:
+                return result
+
+        telegram.send_selection_timeout(chat_id)
+        return None
+    finally:
+        client.delete(_waiting_key(chat_id), _replies_key(chat_id))
+
+
+if __name__ == "__main__":
+    run_update_router()
@@ -0,0 +1,142 @@
+import os
+import threading
+import time
+from workflow.client.cache_client import CacheClient, reference_key
+from workflow.client.postgres_client import PostgresClient
+
+
+USER_CONTEXT_QUERY = """
+    SELECT
+        u.user_id,
+        g.access_token,
+        g.refresh_token,
+        w.last_email_datetime,
+        t.telegram_chat_id,
+        COALESCE(c.categories, ARRAY[]::TEXT[]) AS categories
+    FROM unnest(%s::INT[]) AS u(user_id)
+    LEFT JOIN LATERAL (
+        SELECT access_token, refresh_token
+        FROM gmail_credentials
+        WHERE user_id = u.user_id
+          AND is_active = TRUE
+        LIMIT 1
+    ) g ON TRUE
+    LEFT JOIN user_email_watermark w ON w.user_id = u.user_id
+    LEFT JOIN user_telegram t ON t.user_id = u.user_id
+    LEFT JOIN LATERAL (
+        SELECT array_agg(DISTINCT category) AS categories
+        FROM transaction_category
+        WHERE user_id = u.user_id
+          AND is_active = TRUE
+    ) c ON TRUE;
+"""
+
+
+def load_user_contexts(user_ids):
+    """
+    Fetch everything a workflow run needs before touching Gmail, for one or
+    many users, in a single round trip.
+
+    Returns:
+        dict: user_id -> {
+            "google_tokens": {"access_token", "refresh_token"} or None,
+            "last_email_datetime": datetime or None,
+            "telegram_chat_id": int or None,
+            "transaction_categories": list[str],
+        }
+    """
+    user_ids = [int(user_id) for user_id in user_ids]
+    if not user_ids:
+        return {}
+
+    pg_client = PostgresClient.from_env()
+    rows = pg_client.execute_query(USER_CONTEXT_QUERY, (user_ids,))
+
+    contexts = {}
+    for row in rows:
+        google_tokens = None
+        if row["access_token"]:
+            google_tokens = {
+                "access_token": row["access_token"],
+                "refresh_token": row["refresh_token"],
+            }
+
+        contexts[row["user_id"]] = {
+            "google_tokens": google_tokens,
+            "last_email_datetime": row["last_email_datetime"],
+            "telegram_chat_id": row["telegram_chat_id"],
+            "transaction_categories": list(row["categories"] or []),
+        }
+    return contexts
+
+
+class UserContextCache:
+    """Short-lived, thread-safe cache of per-user workflow context"""
+
+    def __init__(self, ttl_seconds=60):
+        self.ttl_seconds = ttl_seconds
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id, refresh=False):
+        """Return the user's context, loading it (one query) if missing, stale or refresh=True"""
+        user_id = int(user_id)
+        if not refresh:
+            with self._lock:
+                entry = self._entries.get(user_id)
+            if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+                return entry[1]
+
+        return self.prefetch([user_id])[user_id]
+
+    def prefetch(self, user_ids):
+        """Load and cache contexts for a batch of users with a single query"""
+        # Snapshot before the query, so an invalidation that lands while it
+        # runs keeps the old values out of the shared reference cache
+        reference_cache = CacheClient()
+        generations = reference_cache.generations(
+            reference_key(user_id, name)
+            for user_id in user_ids
+            for name in ("categories", "telegram_chat_id")
+        )
+        contexts = load_user_contexts(user_ids)
+        loaded_at = time.monotonic()
+
+        with self._lock:
+            for user_id in user_ids:
+                user_id = int(user_id)
+                # Unknown users still get an (empty) entry so callers don't re-query
+                context = contexts.setdefault(
+                    user_id,
+                    {
+                        "google_tokens": None,
+                        "last_email_datetime": None,
+                        "telegram_chat_id": None,
+                        "transaction_categories": [],
+                    },
+                )
+                self._entries[user_id] = (loaded_at, context)
+
+        # Fresh from the database, so seed the shared reference cache as well
+        for user_id in user_ids:
+            context = contexts[int(user_id)]
+            for name, value in (
+                ("categories", context["transaction_categories"]),
+                ("telegram_chat_id", context["telegram_chat_id"]),
+            ):
+                key = reference_key(user_id, name)
+                reference_cache.set(key, value, generation=generations[key])
+        return contexts
+
+    def invalidate(self, user_id=None):
+        """Drop one user's cached context, or everything when user_id is None"""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(int(user_id), None)
+
+
+user_context_cache = UserContextCache(
+    ttl_seconds=float(os.getenv("USER_CONTEXT_TTL_SECONDS", 60))
+)